@@ -1,5 +1,5 @@
 from sys import exc_info
-from flask import Flask, g
+from flask import Flask, Response, g
 
 # import Flask-APScheduler
 from flask_apscheduler import APScheduler
@@ -8,11 +8,17 @@ import apscheduler
 import apscheduler.schedulers.asyncio
 import flask_apscheduler
 
+import atexit
 import logging
+import os
+import urllib.error
+import urllib.request
 import structlog
 import sys
 import datetime
 
+from supervisor import BotSupervisor
+
 # logging.basicConfig()
 # from structlog.stdlib import LoggerFactory
 # structlog.configure(logger_factory=LoggerFactory())  
@@ -36,16 +42,23 @@ scheduler = APScheduler()
 # scheduler.api_enabled = True
 # scheduler.init_app(app)
 
-import os
+# the bot runs as a supervised child process, restarted as soon as it exits
+bot_supervisor = BotSupervisor()
+atexit.register(bot_supervisor.stop)
+
+# the bot serves its live health and metrics on localhost (see extensions/monitoring.py)
+BOT_METRICS_URL = f"http://127.0.0.1:{os.getenv('BOT_METRICS_PORT', '8765')}"
 
 
-@scheduler.task(trigger='interval', seconds=30, max_instances=1)
-def run_bot():
+def query_bot(path):
+    """Returns (status, body, content type) from the bot's monitoring endpoint, or None if unreachable."""
     try:
-        log.info('starting bot')
-        os.system('python bot.py')
-    except Exception as e:
-        log.error('bot crash', exc_info=e)
+        with urllib.request.urlopen(BOT_METRICS_URL + path, timeout=2) as response:
+            return response.status, response.read(), response.headers.get('Content-Type')
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), e.headers.get('Content-Type')
+    except (urllib.error.URLError, OSError):
+        return None
 
 
 def scheduler_event_listener(event: apscheduler.events.JobExecutionEvent):
@@ -67,7 +80,8 @@ def root():
 @app.route('/jobs')
 def get_jobs():
     job_info = {
-        "count": len(scheduler.get_jobs())
+        "count": len(scheduler.get_jobs()),
+        "bot": bot_supervisor.status()
     }
     for job in scheduler.get_jobs():
         d = {
@@ -79,11 +93,46 @@ def get_jobs():
     return job_info
 
 
+@app.route('/health')
+def health():
+    result = query_bot('/health')
+
+    if result is None:
+        return {"status": "down", "supervisor": bot_supervisor.status()}, 503
+
+    status, body, content_type = result
+    return Response(body, status=status, content_type=content_type)
+
+
+@app.route('/metrics')
+def metrics():
+    result = query_bot('/metrics')
+
+    supervisor = bot_supervisor.status()
+    supervisor_metrics = (
+        "# HELP bot_supervisor_restarts_total Bot process restarts\n"
+        "# TYPE bot_supervisor_restarts_total counter\n"
+        f"bot_supervisor_restarts_total {supervisor['restart_count']}\n"
+        "# HELP bot_up Whether the bot process is running and answering\n"
+        "# TYPE bot_up gauge\n"
+        f"bot_up {1 if result is not None and result[0] == 200 else 0}\n"
+    )
+
+    body = supervisor_metrics
+    if result is not None and result[0] == 200:
+        body += result[1].decode('utf-8')
+
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 log.info('app configured')
 
 log.info('starting scheduler')
 scheduler.start()
 
+log.info('starting bot supervisor')
+bot_supervisor.start()
+
 if __name__ == '__main__':
     logging.basicConfig(
         format="%(message)s", stream=sys.stdout, level=logging.INFO
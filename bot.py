@@ -1,10 +1,21 @@
+import time
+
+# measured before any import: the cold start of the process is the bot's downtime after a restart
+STARTED_AT = time.monotonic()
+
+import asyncio
 import os
+
 import discord
 import structlog
 from dotenv import load_dotenv
 from os.path import join, dirname
 from discord.ext import commands
 
+from extensions import metrics
+
+IMPORTED_AT = time.monotonic()
+
 log = structlog.get_logger()
 
 dotenv_path = join(dirname(__file__), '.env')
@@ -19,36 +30,111 @@ BOT_PREFIX = os.getenv('BOT_PREFIX', '!')
 
 log.info('starting bot', prefix=BOT_PREFIX)
 
+# an extension taking longer than this to load (import, setup and cog_load) is flagged in the startup report
+EXTENSION_LOAD_BUDGET = 2.0
+
+# extension -> extensions that must be loaded before it. Every cog reads the
+# settings and shared clients of UtilsCog; the others are independent and
+# are loaded concurrently.
+EXTENSIONS = {
+    'extensions.utils': (),
+    'extensions.monitoring': ('extensions.utils',),
+    'extensions.help': ('extensions.utils',),
+    'extensions.admin': ('extensions.utils',),
+    'extensions.team': ('extensions.utils',),
+    'extensions.poll': ('extensions.utils',),
+    'extensions.welcome': ('extensions.utils',),
+    'extensions.auto_message': ('extensions.utils',),
+    'extensions.checkin': ('extensions.utils',),
+}
+
+
+class HicBot(commands.Bot):
+    async def setup_hook(self):
+        # called once per process, unlike on_ready which runs again after every reconnect.
+        # The cogs need the guild in their cog_load, so the loading waits for the first ready.
+        self.startup_task = asyncio.create_task(startup())
+
+
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix=BOT_PREFIX, case_insensitive=True, intents=intents)
+bot = HicBot(command_prefix=BOT_PREFIX, case_insensitive=True, intents=intents)
+bot.time_to_ready = None
 
 
 @bot.event
 async def on_ready():
     log.info('bot logged in', user=bot.user.name)
 
-    EXTENSIONS = [
-        'extensions.utils',
-        'extensions.help',
-        'extensions.admin',
-        'extensions.team',
-        'extensions.poll',
-        'extensions.welcome',
-        'extensions.auto_message',
-        'extensions.checkin'
-    ]
-
-    for extension in EXTENSIONS:
-        log.info('loading extension', name=extension)
-        await bot.load_extension(extension)
+
+async def startup():
+    await bot.wait_until_ready()
+    connected_at = time.monotonic()
+
+    timings = await load_extensions()
+    ready_at = time.monotonic()
+
+    bot.time_to_ready = ready_at - STARTED_AT
+    metrics.STARTUP_DURATION.set(IMPORTED_AT - STARTED_AT, phase='imports')
+    metrics.STARTUP_DURATION.set(connected_at - IMPORTED_AT, phase='connect')
+    metrics.STARTUP_DURATION.set(ready_at - connected_at, phase='extensions')
+    metrics.STARTUP_DURATION.set(bot.time_to_ready, phase='total')
 
     # stream = discord.Streaming(name='Hacking Industry Camp',url='https://www.twitch.tv/alsacedigitale')
     # await bot.change_presence(activity=stream)
 
     await post_version_message()
+    await post_startup_report(timings)
     log.info('bot ready')
 
 
+async def load_extensions():
+    """Loads EXTENSIONS as soon as their dependencies are loaded; returns {extension: seconds or exception}."""
+    tasks = {}
+    timings = {}
+
+    async def load(name):
+        await asyncio.gather(*(tasks[dependency] for dependency in EXTENSIONS[name]))
+
+        log.info('loading extension', name=name)
+        started_at = time.monotonic()
+        try:
+            await bot.load_extension(name)
+        except Exception as e:
+            log.error('could not load extension', name=name, exc_info=e)
+            timings[name] = e
+            raise
+        timings[name] = time.monotonic() - started_at
+
+    for name in EXTENSIONS:
+        tasks[name] = asyncio.create_task(load(name))
+
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    for name in EXTENSIONS:
+        # skipped because a dependency failed
+        timings.setdefault(name, None)
+
+    return timings
+
+
+async def post_startup_report(timings):
+    lines = []
+    for name, timing in timings.items():
+        if isinstance(timing, float):
+            over_budget = " (> budget)" if timing > EXTENSION_LOAD_BUDGET else ""
+            lines.append(f"{name:<26} {timing:6.2f}s{over_budget}")
+        elif timing is None:
+            lines.append(f"{name:<26} non chargée (dépendance en échec)")
+        else:
+            lines.append(f"{name:<26} ÉCHEC : {timing!r}"[:200])
+
+    imports = IMPORTED_AT - STARTED_AT
+    log.info('extensions loaded', time_to_ready=round(bot.time_to_ready, 2), imports=round(imports, 2),
+             timings={name: round(t, 3) if isinstance(t, float) else repr(t) for name, t in timings.items()})
+    await bot_log_message(f"Prêt en {bot.time_to_ready:.1f}s (imports {imports:.2f}s) :\n```\n"
+                          + "\n".join(lines) + "\n```")
+
+
 async def post_version_message():
     SCALINGO_APP = os.getenv('APP')
     SCALINGO_CONTAINER_VERSION = os.getenv('CONTAINER_VERSION')
@@ -27,12 +27,11 @@ class AdminCog(BaseCog):
         """
 
         author = ctx.message.author
-        role_names = [r.name for r in author.roles]
         log.info('checking if user is admin', user=author.name, admin_role=self.settings.ADMIN_ROLE)
 
-        is_admin = self.settings.ADMIN_ROLE in role_names
+        is_admin = self.permissions.has(author, perms.SUPPORT)
 
-        log.info('roles', roles=role_names, is_admin=is_admin)
+        log.info('roles', roles=[r.name for r in author.roles], is_admin=is_admin)
 
         if is_admin:
             await ctx.message.add_reaction(SUCCESS)
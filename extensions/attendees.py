@@ -0,0 +1,98 @@
+import asyncio
+import time
+from typing import Optional
+
+import structlog
+
+from .backend import BackendClient
+
+log = structlog.get_logger('attendees')
+
+
+class AttendeeRepository:
+    """
+    In-memory copy of the backend `/api/attendees/` list.
+
+    The list is downloaded at most once per `ttl` seconds (or on demand with
+    `load(force=True)` after a write) and indexed by discord id, attendee id
+    and lowercase email so lookups don't scan the whole list.
+
+    `find_discord_id()` reloads the list on a miss, at most once per
+    `MISS_RELOAD_INTERVAL` seconds: a member who links their account and
+    joins right away is not in the cached copy yet.
+    """
+
+    MISS_RELOAD_INTERVAL = 5
+
+    def __init__(self, backend: BackendClient, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._attendees = []
+        self._by_discord_id = {}
+        self._by_id = {}
+        self._by_email = {}
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._older_than(self.ttl)
+
+    def _older_than(self, age: float) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > age
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    async def load(self, force=False, max_age: Optional[float] = None) -> list:
+        """
+        Returns the attendee list, downloading it again if it is stale (older than `max_age`
+        if given, `ttl` otherwise) or `force` is set.
+        """
+        max_age = self.ttl if max_age is None else max_age
+
+        if not force and not self._older_than(max_age):
+            return self._attendees
+
+        async with self._lock:
+            # another caller may have refreshed while we were waiting for the lock
+            if force or self._older_than(max_age):
+                started_at = time.monotonic()
+                attendees = await self.backend.get_json('/api/attendees/')
+                self._index(attendees)
+                self._loaded_at = time.monotonic()
+                log.debug('attendees: loaded', count=len(attendees), duration=self._loaded_at - started_at)
+
+        return self._attendees
+
+    def _index(self, attendees):
+        self._attendees = attendees
+        self._by_discord_id = {a['discord_unique_id']: a for a in attendees if a.get('discord_unique_id') is not None}
+        self._by_id = {a['id']: a for a in attendees if a.get('id') is not None}
+        self._by_email = {a['email_address'].lower(): a for a in attendees if a.get('email_address')}
+
+    @property
+    def discord_ids(self):
+        return self._by_discord_id.keys()
+
+    def by_discord_id(self, discord_id: int) -> Optional[dict]:
+        return self._by_discord_id.get(discord_id)
+
+    async def find_discord_id(self, discord_id: int) -> Optional[dict]:
+        """by_discord_id() on an up-to-date list: a miss triggers a (throttled) reload."""
+        await self.load()
+        attendee = self.by_discord_id(discord_id)
+
+        if attendee is None:
+            await self.load(max_age=self.MISS_RELOAD_INTERVAL)
+            attendee = self.by_discord_id(discord_id)
+
+        return attendee
+
+    def by_id(self, attendee_id: int) -> Optional[dict]:
+        return self._by_id.get(attendee_id)
+
+    def by_email(self, email: str) -> Optional[dict]:
+        if not email:
+            return None
+        return self._by_email.get(email.lower())
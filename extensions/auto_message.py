@@ -1,11 +1,11 @@
+import asyncio
+import heapq
 import re
 from datetime import datetime
-from functools import cached_property
 
 import discord
-import discord.state
 import structlog
-from discord.ext import tasks, commands
+from discord.ext import commands
 
 from extensions.base_cog import BaseCog
 
@@ -13,20 +13,29 @@ log = structlog.get_logger('auto_message')
 
 
 class AutoMessageCog(BaseCog):
-    messages = []
+    # parsed scheduled messages: {message id: entry}
+    messages = {}
 
-    @cached_property
+    @property
     def channel_msg_auto(self):
         return self.settings.get_channel('MSG_AUTO')
 
     def __init__(self, bot):
         super().__init__(bot)
+        # send queue: heap of (date, message id); entries no longer matching self.messages are skipped
+        self._schedule = []
+        self._schedule_changed = asyncio.Event()
+        self._sender = None
 
     async def cog_load(self):
         await super().cog_load()
 
         await self.loadMessagesAuto()
-        self.send_msg_auto.start()
+        self._sender = asyncio.create_task(self.send_msg_auto())
+
+    async def cog_unload(self):
+        if self._sender is not None:
+            self._sender.cancel()
 
     def stripList(self, l):
         return list(map(lambda s: s.strip(), l))
@@ -43,125 +52,157 @@ class AutoMessageCog(BaseCog):
             return None
 
     async def loadMessagesAuto(self):
-        self.messages = []
+        self.messages = {}
+        self._schedule = []
 
         async for message in self.channel_msg_auto.history(limit=None):
-            try:
-                if len(message.reactions) > 0:
-                    continue
+            await self.loadMessageAuto(message)
 
-                content = message.content
+    async def loadMessageAuto(self, message):
+        """(Re-)parses a single message of the msg_auto channel and updates the schedule accordingly."""
+        self._unschedule(message.id)
 
-                if '\n-----\n' not in content:
-                    log.error('Auto Message: Error 1')
-                    await message.add_reaction('👎')
-                    continue
+        try:
+            if len(message.reactions) > 0:
+                return
 
-                headers_body = self.stripList(content.split('\n-----\n', 1))
+            content = message.content
 
-                if len(headers_body) != 2:
-                    log.error('Auto Message: Error 2')
-                    await message.add_reaction('👎')
-                    continue
+            if '\n-----\n' not in content:
+                log.error('Auto Message: Error 1')
+                await message.add_reaction('👎')
+                return
 
-                raw_headers, body = self.stripList(headers_body)
+            headers_body = self.stripList(content.split('\n-----\n', 1))
 
-                if len(body) < 1:
-                    log.error('Auto Message: Error 3')
-                    await message.add_reaction('👎')
-                    continue
+            if len(headers_body) != 2:
+                log.error('Auto Message: Error 2')
+                await message.add_reaction('👎')
+                return
 
-                obj = dict({
-                    'id': message.id,
-                    'couleur': 2013674,
-                    'body': body
-                })
-
-                for raw_header in raw_headers.split('\n'):
-                    if ':' not in raw_header:
-                        continue
-
-                    key, value = self.stripList(raw_header.split(':', 1))
-
-                    if key == '' or value == '':
-                        continue
-
-                    if key == 'Date':
-                        obj['date'] = datetime.strptime(value, '%d/%m/%Y %H:%M')
-                    elif key == 'Salons':
-                        if ' ' in value:
-                            obj['salons'] = list(map(lambda s: int(s[2:-1].strip()), value.split(' ')))
-                        else:
-                            obj[key.lower()] = [int(value[2:-1])]
-                    elif key == 'Couleur':
-                        if re.search('^[0-9A-Fa-f]{6}$', value):
-                            obj['couleur'] = int(f"0x{value}", 0)
-                        else:
-                            val = self.checkNumber(value)
-
-                            if val is None:
-                                log.error('Auto Message: Error 4')
-                                await message.add_reaction('👎')
-                                continue
-
-                            obj['couleur'] = val
-                    else:
-                        obj[key.lower()] = value
+            raw_headers, body = self.stripList(headers_body)
+
+            if len(body) < 1:
+                log.error('Auto Message: Error 3')
+                await message.add_reaction('👎')
+                return
+
+            obj = dict({
+                'id': message.id,
+                'couleur': 2013674,
+                'body': body
+            })
 
-                if 'date' not in obj or 'salons' not in obj:
-                    log.error('Auto Message: Error 5')
-                    await message.add_reaction('👎')
+            for raw_header in raw_headers.split('\n'):
+                if ':' not in raw_header:
                     continue
 
-                if obj['date'] <= datetime.now():
-                    await message.add_reaction('⏲')
+                key, value = self.stripList(raw_header.split(':', 1))
+
+                if key == '' or value == '':
                     continue
 
-                self.messages.append(obj)
-            except Exception as e:
-                log.error('parsing of message crashed', message=message, exc_info=e)
-                await message.add_reaction('☠️')
+                if key == 'Date':
+                    obj['date'] = datetime.strptime(value, '%d/%m/%Y %H:%M')
+                elif key == 'Salons':
+                    if ' ' in value:
+                        obj['salons'] = list(map(lambda s: int(s[2:-1].strip()), value.split(' ')))
+                    else:
+                        obj[key.lower()] = [int(value[2:-1])]
+                elif key == 'Couleur':
+                    if re.search('^[0-9A-Fa-f]{6}$', value):
+                        obj['couleur'] = int(f"0x{value}", 0)
+                    else:
+                        val = self.checkNumber(value)
+
+                        if val is None:
+                            log.error('Auto Message: Error 4')
+                            await message.add_reaction('👎')
+                            continue
+
+                        obj['couleur'] = val
+                else:
+                    obj[key.lower()] = value
+
+            if 'date' not in obj or 'salons' not in obj:
+                log.error('Auto Message: Error 5')
+                await message.add_reaction('👎')
+                return
+
+            if obj['date'] <= datetime.now():
+                await message.add_reaction('⏲')
+                return
+
+            self.messages[message.id] = obj
+            heapq.heappush(self._schedule, (obj['date'], message.id))
+            self._schedule_changed.set()
+        except Exception as e:
+            log.error('parsing of message crashed', message=message, exc_info=e)
+            await message.add_reaction('☠️')
+
+    def _unschedule(self, message_id):
+        # the heap entry stays behind and is discarded when it reaches the top
+        if self.messages.pop(message_id, None) is not None:
+            self._schedule_changed.set()
 
-    @tasks.loop(seconds=30.0)
     async def send_msg_auto(self):
-        now = datetime.now().replace(second=0)
-        # print(now)
+        """Sleeps until the next scheduled message is due (or the schedule changes), then sends it."""
+        while True:
+            self._schedule_changed.clear()
+            now = datetime.now()
+            timeout = None
+
+            while self._schedule:
+                date, message_id = self._schedule[0]
+                message = self.messages.get(message_id)
+
+                if message is None or message['date'] != date:
+                    # edited or deleted since it was scheduled
+                    heapq.heappop(self._schedule)
+                    continue
 
-        # print(self.messages)
+                if date > now:
+                    timeout = (date - now).total_seconds()
+                    break
 
-        for index in range(len(self.messages)):
-            message = self.messages[index]
+                heapq.heappop(self._schedule)
+                del self.messages[message_id]
 
-            if message['date'] > now:
-                continue
+                try:
+                    await self._send_message(message)
+                except Exception as e:
+                    log.error('sending of message crashed', message_id=message_id, exc_info=e)
 
-            embed = discord.Embed(
-                colour=message['couleur'],
-                description=message['body']
-            )
+            try:
+                await asyncio.wait_for(self._schedule_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
 
-            if 'titre' in message:
-                embed.title = message['titre']
+    async def _send_message(self, message):
+        embed = discord.Embed(
+            colour=message['couleur'],
+            description=message['body']
+        )
 
-            for salon_id in message['salons']:
-                salon = discord.utils.find(lambda c: c.id == salon_id, self.guild.channels)
+        if 'titre' in message:
+            embed.title = message['titre']
 
-                if salon is None:
-                    continue
+        for salon_id in message['salons']:
+            salon = self.guild.get_channel(salon_id)
 
-                await salon.send(embed=embed)
+            if salon is None:
+                continue
 
-            await self.channel_msg_auto.get_partial_message(message['id']).add_reaction('👍')
-            del self.messages[index]
+            await salon.send(embed=embed)
 
-        # print(self.messages)
+        await self.channel_msg_auto.get_partial_message(message['id']).add_reaction('👍')
 
     @commands.Cog.listener()
     async def on_message(self, message):
         channel = message.channel
 
         if channel == self.channel_msg_auto:
-            await self.loadMessagesAuto()
+            await self.loadMessageAuto(message)
 
     @commands.Cog.listener()
     async def on_raw_message_edit(self, payload):
@@ -169,7 +210,13 @@ class AutoMessageCog(BaseCog):
             channel_id = payload.channel_id
 
             if channel_id == self.channel_msg_auto.id:
-                await self.loadMessagesAuto()
+                try:
+                    message = await self.channel_msg_auto.fetch_message(payload.message_id)
+                except discord.NotFound:
+                    self._unschedule(payload.message_id)
+                    return
+
+                await self.loadMessageAuto(message)
 
     @commands.Cog.listener()
     async def on_raw_message_delete(self, payload):
@@ -177,7 +224,7 @@ class AutoMessageCog(BaseCog):
             channel_id = payload.channel_id
 
             if channel_id == self.channel_msg_auto.id:
-                await self.loadMessagesAuto()
+                self._unschedule(payload.message_id)
 
 
 async def setup(bot):
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+import aiohttp
+import structlog
+
+from .instrumentation import count_backend_call
+from .metrics import BACKEND_REQUESTS, endpoint_label
+
+log = structlog.get_logger('backend')
+
+# per-endpoint timeouts (seconds), matched on the path prefix
+ENDPOINT_TIMEOUTS = {
+    '/api/attendees/checkin/': 10,
+    '/api/attendees/': 10,
+    '/api/project-teams/': 5,
+}
+
+
+class BackendError(Exception):
+    """Raised when the hic-manager backend cannot be reached or times out."""
+
+
+class BackendResponse:
+    def __init__(self, status_code: int, text: str, url: str = ''):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+    def json(self):
+        """Decoded JSON body; a body that is not JSON (e.g. an HTML error page from a proxy) raises BackendError."""
+        try:
+            return json.loads(self.text)
+        except ValueError as e:
+            log.warning('backend response is not JSON', url=self.url, status=self.status_code, body=self.text[:200])
+            raise BackendError(f"{self.url}: HTTP {self.status_code}, invalid JSON body") from e
+
+
+class BackendClient:
+    """
+    Shared asynchronous client for the hic-manager backend.
+
+    A single keep-alive session is used by all the cogs, and the number of
+    requests in flight is bounded so a burst of commands cannot flood the API.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(settings.API_MAX_CONCURRENCY)
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.settings.API_MAX_CONCURRENCY, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+            log.debug('backend: session opened', url=self.settings.URL_API)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _timeout_for(self, path: str) -> float:
+        for prefix, timeout in ENDPOINT_TIMEOUTS.items():
+            if path.startswith(prefix):
+                return timeout
+        return self.settings.API_TIMEOUT
+
+    async def request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> BackendResponse:
+        await self.start()
+
+        url = f"{self.settings.URL_API}{path}"
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self._timeout_for(path))
+
+        count_backend_call()
+
+        async with self._semaphore:
+            started_at = time.monotonic()
+            status = 'error'
+            try:
+                async with self._session.request(method, url, timeout=client_timeout, **kwargs) as response:
+                    text = await response.text()
+                    status = response.status
+                    return BackendResponse(response.status, text, f"{method} {path}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                log.warning('backend request failed', method=method, path=path, error=repr(e))
+                raise BackendError(f"{method} {path}: {e!r}") from e
+            finally:
+                BACKEND_REQUESTS.observe(time.monotonic() - started_at, method=method,
+                                         endpoint=endpoint_label(path), status=status)
+
+    async def get(self, path: str, **kwargs) -> BackendResponse:
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> BackendResponse:
+        return await self.request('POST', path, **kwargs)
+
+    async def patch(self, path: str, **kwargs) -> BackendResponse:
+        return await self.request('PATCH', path, **kwargs)
+
+    async def get_json(self, path: str, **kwargs):
+        """GET a path and decode the JSON body, raising BackendError on a non-2xx status."""
+        response = await self.get(path, **kwargs)
+
+        if not 200 <= response.status_code < 300:
+            raise BackendError(f"GET {path}: HTTP {response.status_code}")
+
+        # Handle empty response
+        if not response.text.strip():
+            log.error('backend empty response', path=path)
+            return []
+
+        return response.json()
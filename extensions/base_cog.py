@@ -6,6 +6,10 @@ import structlog
 from discord import Guild
 from discord.ext import commands
 
+from .attendees import AttendeeRepository
+from .backend import BackendClient
+from .mutations import MemberMutationQueue
+from .perms import PermissionService
 from .settings import Settings
 
 log = structlog.get_logger()
@@ -15,7 +19,7 @@ log = structlog.get_logger()
 async def progress_message(ctx, task_desc):
     msg = await ctx.send(task_desc + "...")
     try:
-        yield
+        yield msg
     except Exception as e:
         await msg.edit(content=task_desc + " ❌ (exception)")
         log.exception("progress_message exception", task_desc=task_desc, exc=e)
@@ -39,6 +43,22 @@ class BaseCog(commands.Cog):
     def settings(self) -> Settings:
         return self.utils_cog.settings
 
+    @cached_property
+    def backend(self) -> BackendClient:
+        return self.utils_cog.backend
+
+    @cached_property
+    def attendees(self) -> AttendeeRepository:
+        return self.utils_cog.attendees
+
+    @cached_property
+    def mutations(self) -> MemberMutationQueue:
+        return self.utils_cog.mutations
+
+    @cached_property
+    def permissions(self) -> PermissionService:
+        return self.utils_cog.permissions
+
     @property
     def guild(self) -> Optional[Guild]:
         return self.settings.guild
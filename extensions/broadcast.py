@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import List, Optional, Tuple
+
+import discord
+import structlog
+
+log = structlog.get_logger('broadcast')
+
+
+class BroadcastResult:
+    def __init__(self):
+        self.sent: List[discord.Member] = []
+        self.forbidden: List[discord.Member] = []
+        self.errors: List[discord.Member] = []
+        self.resumed = 0
+        self.rate_limited = 0
+        self.duration = 0.0
+
+    @property
+    def failed(self) -> int:
+        return len(self.forbidden) + len(self.errors)
+
+
+class _RateLimitListener(logging.Handler):
+    """
+    discord.py retries 429s itself and only reports them through the `discord.http`
+    logger ("... Retrying in 1.23 seconds."): the delay it announces slows the broadcast down.
+    """
+
+    RETRY_AFTER = re.compile(r'retrying in ([\d.]+) seconds', re.IGNORECASE)
+
+    def __init__(self, broadcast: 'DmBroadcast'):
+        super().__init__(logging.WARNING)
+        self.broadcast = broadcast
+
+    def emit(self, record):
+        message = record.getMessage()
+        if 'rate limit' not in message.lower():
+            return
+
+        match = self.RETRY_AFTER.search(message)
+        try:
+            self.broadcast._rate_limited(float(match.group(1)) if match else None)
+        except RuntimeError:
+            # logged outside of the event loop thread: nothing to pace
+            pass
+
+
+class DmBroadcast:
+    """
+    Sends a DM to many members with a bounded pool of workers.
+
+    Pacing is shared by the workers: the delay between two sends grows when
+    Discord rate limits the bot, and shrinks back while sends go through
+    quickly. discord.py retries the 429s itself, so they are seen through its
+    `discord.http` log records (the announced retry delay is honoured, for any
+    route: a global limit affects the DMs as well); a 429 that still surfaces
+    as HTTPException is handled the same way. A send slower than `SLOW_SEND`
+    (discord.py waiting on an exhausted bucket, which it does not log at the
+    default level) also slows the pace down. Members reached are appended to a progress file under `state_dir`,
+    with a digest of the message they got, so running the same broadcast again
+    after a restart skips them. Only the same message is skipped: a later
+    broadcast with the same name but another content is sent again. The file
+    is removed once the broadcast completes, and ignored (then replaced) when
+    it is older than `RESUME_TTL`, e.g. left behind by a crash long ago.
+    """
+
+    MIN_DELAY = 0.2
+    MAX_DELAY = 10.0
+    SLOW_SEND = 1.5
+    MAX_ATTEMPTS = 3
+    # a progress file older than this (seconds) belongs to another run
+    RESUME_TTL = 6 * 3600
+
+    def __init__(self, name: str, state_dir: str, workers: int = 4, progress_interval: float = 5.0):
+        self.name = name
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.progress_path = os.path.join(state_dir, f"broadcast-{name}.progress")
+        self._delay = self.MIN_DELAY
+        self._next_send_at = 0.0
+        self._pace_lock = asyncio.Lock()
+        self._progress_file = None
+        self._done = 0
+        self._total = 0
+        self._rate_limits_seen = 0
+
+    @staticmethod
+    def _digest(send_kwargs: dict) -> str:
+        """Short digest of a message, to resume only the same broadcast."""
+        content = {key: value.to_dict() if hasattr(value, 'to_dict') else value for key, value in send_kwargs.items()}
+        return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def _load_progress(self) -> set:
+        """{(member id, message digest)} already sent by an interrupted run of this broadcast."""
+        if not os.path.exists(self.progress_path):
+            return set()
+
+        age = time.time() - os.path.getmtime(self.progress_path)
+        if age > self.RESUME_TTL:
+            log.info('broadcast progress expired', broadcast=self.name, age=round(age))
+            os.remove(self.progress_path)
+            return set()
+
+        with open(self.progress_path) as f:
+            entries = (line.split() for line in f)
+            return {(int(entry[0]), entry[1]) for entry in entries if len(entry) == 2}
+
+    def _record_progress(self, member: discord.Member, digest: str):
+        self._progress_file.write(f"{member.id} {digest}\n")
+        self._progress_file.flush()
+
+    async def _pace(self):
+        loop = asyncio.get_running_loop()
+        async with self._pace_lock:
+            wait = self._next_send_at - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_send_at = loop.time() + self._delay
+
+    def _slow_down(self, retry_after: Optional[float] = None):
+        self._delay = min(max(self._delay * 2, retry_after or 0), self.MAX_DELAY)
+        loop = asyncio.get_running_loop()
+        self._next_send_at = max(self._next_send_at, loop.time() + (retry_after or self._delay))
+
+    def _rate_limited(self, retry_after: Optional[float]):
+        self._rate_limits_seen += 1
+        log.warning('broadcast rate limited', broadcast=self.name, retry_after=retry_after)
+        self._slow_down(retry_after)
+
+    def _speed_up(self):
+        self._delay = max(self._delay * 0.9, self.MIN_DELAY)
+
+    async def _send(self, member: discord.Member, send_kwargs: dict, result: BroadcastResult):
+        for attempt in range(self.MAX_ATTEMPTS):
+            await self._pace()
+            started_at = time.monotonic()
+
+            try:
+                dm_channel = member.dm_channel or await member.create_dm()
+                await dm_channel.send(**send_kwargs)
+            except discord.Forbidden:
+                # User has DMs disabled
+                log.warning('broadcast dm forbidden', broadcast=self.name, member=member.name, member_id=member.id)
+                result.forbidden.append(member)
+                return
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    result.rate_limited += 1
+                    retry_after = None
+                    if e.response is not None:
+                        retry_after = float(e.response.headers.get('Retry-After', 0)) or None
+                    log.warning('broadcast rate limited', broadcast=self.name, retry_after=retry_after)
+                    self._slow_down(retry_after)
+                    continue
+                log.error('broadcast dm failed', broadcast=self.name, member=member.name, exc_info=e)
+                result.errors.append(member)
+                return
+
+            if time.monotonic() - started_at > self.SLOW_SEND:
+                self._slow_down()
+            else:
+                self._speed_up()
+
+            result.sent.append(member)
+            self._record_progress(member, self._digest(send_kwargs))
+            log.info('broadcast dm sent', broadcast=self.name, member=member.name, member_id=member.id)
+            return
+
+        result.errors.append(member)
+
+    async def _worker(self, queue: asyncio.Queue, result: BroadcastResult):
+        while True:
+            try:
+                member, send_kwargs = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                await self._send(member, send_kwargs, result)
+            except Exception as e:
+                log.error('broadcast worker crashed', broadcast=self.name, member=member.name, exc_info=e)
+                result.errors.append(member)
+            finally:
+                self._done += 1
+
+    async def _report_progress(self, message: discord.Message, task_desc: str, result: BroadcastResult):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            try:
+                await message.edit(content=f"{task_desc}... {self._done}/{self._total} "
+                                           f"(✅ {len(result.sent)}, ❌ {result.failed})")
+            except discord.HTTPException as e:
+                log.warning('broadcast progress edit failed', broadcast=self.name, exc_info=e)
+
+    async def run(self, recipients: List[Tuple[discord.Member, dict]], progress_message: discord.Message = None,
+                  task_desc: str = None) -> BroadcastResult:
+        """
+        Sends `send_kwargs` (passed to `channel.send`) to each `(member, send_kwargs)` of `recipients`.
+        If `progress_message` is given, it is edited periodically with the progress.
+        """
+        result = BroadcastResult()
+        started_at = time.monotonic()
+
+        already_sent = self._load_progress()
+        queue = asyncio.Queue()
+
+        for member, send_kwargs in recipients:
+            if (member.id, self._digest(send_kwargs)) in already_sent:
+                result.resumed += 1
+                continue
+            queue.put_nowait((member, send_kwargs))
+
+        self._total = queue.qsize()
+        self._done = 0
+
+        if already_sent:
+            log.info('broadcast resumed', broadcast=self.name, already_sent=len(already_sent))
+
+        os.makedirs(os.path.dirname(self.progress_path) or '.', exist_ok=True)
+        self._progress_file = open(self.progress_path, 'a')
+
+        reporter = None
+        if progress_message is not None:
+            reporter = asyncio.create_task(self._report_progress(progress_message, task_desc or self.name, result))
+
+        rate_limit_listener = _RateLimitListener(self)
+        logging.getLogger('discord.http').addHandler(rate_limit_listener)
+
+        try:
+            await asyncio.gather(*(self._worker(queue, result) for _ in range(self.workers)))
+        finally:
+            logging.getLogger('discord.http').removeHandler(rate_limit_listener)
+            self._progress_file.close()
+            if reporter is not None:
+                reporter.cancel()
+
+        result.rate_limited += self._rate_limits_seen
+
+        # completed: the next run of this broadcast starts from scratch
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+
+        result.duration = time.monotonic() - started_at
+        log.info('broadcast complete', broadcast=self.name, sent=len(result.sent), failed=result.failed,
+                 resumed=result.resumed, rate_limited=result.rate_limited, duration=result.duration)
+
+        return result
@@ -1,10 +1,21 @@
+import asyncio
+import csv
+import io
+import os
+import re
+import time
+from datetime import datetime, timezone
+
 import discord
-import requests
 import structlog
-import time
-from discord.ext import commands
+from discord.ext import commands, tasks
 
+from extensions.backend import BackendError
 from extensions.base_cog import BaseCog
+from extensions.checkin_index import CheckinIndex, CheckinStatus
+from extensions.checkin_queue import AutoCheckinQueue
+from extensions.checkin_store import CheckinStore
+from extensions.event_window import EventWindow
 from extensions.perms import is_support_user
 
 log = structlog.get_logger()
@@ -13,72 +24,113 @@ log = structlog.get_logger()
 class CheckinCog(BaseCog):
     """Cog for checking in attendees at the physical event"""
 
+    # check-ins in flight at once for !checkin_bulk
+    BULK_CHECKIN_CONCURRENCY = 8
+    # the live dashboard is edited at most once per interval (seconds)
+    DASHBOARD_MIN_INTERVAL = 10
+    # without dashboard nor auto check-in, the status index stops refreshing after this long unused (seconds)
+    STATUS_INDEX_IDLE = 15 * 60
+
     def __init__(self, bot):
         super().__init__(bot)
         self.api_url = None
         self.auto_checkin_enabled = False
-        # Cache to track check-in status and avoid hammering the API
-        self._checkin_cache = {}  # {member_id: 'pending' | 'checked' | timestamp}
-        self._checkin_cooldown = 300  # 5 minutes cooldown between failed attempts
-        self._event_dates_cache = None  # Cache event dates to avoid repeated API calls
-        self._event_dates_last_check = 0  # Timestamp of last event dates check
+        # Check-in state of the members, to avoid hammering the API (created in cog_load, it needs the settings)
+        self._checkins: CheckinStore = None
+        self._event_window: EventWindow = None
+        # first messages are queued and checked in by batches, off the message listener
+        self._auto_checkins = AutoCheckinQueue(self._submit_auto_checkins)
+        # status of every attendee, for !checkin_status, !checkin_stats and the dashboard
+        self._status_index = CheckinIndex(team_of=self._team_of)
+        self._status_index_used_at = 0.0
+        self._dashboard: discord.Message = None
+        self._dashboard_task: asyncio.Task = None
 
     async def cog_load(self):
         await super().cog_load()
         self.api_url = self.settings.URL_API
         # Enable auto check-in if configured
-        self.auto_checkin_enabled = getattr(self.settings, 'AUTO_CHECKIN_ENABLED', False)
+        self.auto_checkin_enabled = self.settings.AUTO_CHECKIN_ENABLED
+        self._checkins = CheckinStore(os.path.join(self.settings.STATE_DIR, 'checkins.sqlite3'),
+                                      failure_cooldown=300,  # 5 minutes cooldown between failed attempts
+                                      max_entries=self.settings.CHECKIN_STORE_MAX_ENTRIES)
+        self._checkins.load()
+        self._event_window = EventWindow(self.backend, self.settings)
         if self.auto_checkin_enabled:
-            log.info('auto_checkin_enabled', mode='message_activity', cooldown=self._checkin_cooldown)
+            log.info('auto_checkin_enabled', mode='message_activity', cooldown=self._checkins.failure_cooldown,
+                     bulk_endpoint=self.settings.CHECKIN_BULK_ENDPOINT or None)
+            self._auto_checkins.start()
+            self.sweep_checkin_cache.start()
+            self._use_status_index()
         else:
             log.info('auto_checkin_disabled')
 
+    async def cog_unload(self):
+        self.refresh_status_index.cancel()
+        if self._dashboard_task is not None:
+            self._dashboard_task.cancel()
+        self.sweep_checkin_cache.cancel()
+        self._event_window.close()
+        await self._auto_checkins.stop()
+        await self._checkins.snapshot()
+
+    @tasks.loop(minutes=5)
+    async def sweep_checkin_cache(self):
+        """Drops the expired pending/failed entries and snapshots the checked members."""
+        expired = self._checkins.expire()
+        if expired:
+            log.debug('checkin_cache_swept', removed=expired, size=len(self._checkins))
+        await self._checkins.snapshot()
+
+    @tasks.loop(minutes=2)
+    async def refresh_status_index(self):
+        """
+        Periodic refresh of the check-in status index from the attendee list (check-ins done elsewhere),
+        only while the index is in use: auto check-in, a live dashboard, or a recent status command.
+        """
+        dashboard_running = self._dashboard_task is not None and not self._dashboard_task.done()
+        if not (self.auto_checkin_enabled or dashboard_running
+                or time.monotonic() - self._status_index_used_at < self.STATUS_INDEX_IDLE):
+            log.debug('checkin_status_index_idle')
+            # not refreshed anymore: the next use reloads it
+            self._status_index.loaded = False
+            self.refresh_status_index.stop()
+            return
+
+        try:
+            # the shared attendee list: downloaded again only when older than BOT_ATTENDEES_TTL
+            self._status_index.apply(await self.attendees.load())
+        except BackendError as e:
+            log.warning('checkin_status_index_refresh_failed', error=str(e))
+
+    def _use_status_index(self):
+        self._status_index_used_at = time.monotonic()
+        if not self.refresh_status_index.is_running():
+            self.refresh_status_index.start()
+
+    def _team_of(self, discord_id: int):
+        member = self.guild.get_member(discord_id) if self.guild is not None else None
+        if member is None:
+            return None
+        return next((role.name for role in member.roles if role.name.startswith(self.settings.TEAM_PREFIX)), None)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self._status_index.set_team(after.id, self._team_of(after.id))
+
     def _is_event_active(self) -> bool:
         """
-        Check if the event is currently active based on start_date and end_date.
+        Check if the event is currently active based on its start and end dates.
         
         Returns:
             bool: True if event is active or if no dates are configured (allow check-in anytime)
         
         Note:
-            Currently returns True by default since the event API endpoint with start_date/end_date
-            is not yet implemented. When available, this method will check actual event dates.
-            Behavior: If no dates are set, auto check-in is allowed (permissive default).
+            A pure in-memory comparison: the dates come from the settings or are reloaded in the
+            background from BOT_EVENT_ENDPOINT (see EventWindow).
         """
-        current_time = time.time()
-        
-        # Refresh event dates cache every 5 minutes
-        if current_time - self._event_dates_last_check > 300:
-            try:
-                # Fetch event info from API
-                # Note: Currently no direct event endpoint with start_date/end_date exists
-                # When implemented, add proper date checking here
-                response = requests.get(
-                    f"{self.api_url}/api/project-teams/",
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    teams = response.json()
-                    if teams and len(teams) > 0:
-                        # Get event code from first team
-                        event_code = teams[0].get('event')
-                        if event_code:
-                            # Assume event is always active for now
-                            # This is safe - dates will be enforced when the endpoint is available
-                            self._event_dates_cache = {'active': True}
-                            self._event_dates_last_check = current_time
-                            return True
-            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
-                log.warning('event_dates_check_failed', error=str(e))
-        
-        # If we have cached dates, check them
-        if self._event_dates_cache:
-            return self._event_dates_cache.get('active', True)
-        
-        # No dates configured or cached - allow check-in anytime (safer default)
-        log.debug('event_dates_not_configured', behavior='allow_checkin_anytime')
-        return True
+        return self._event_window.is_active()
 
     async def _perform_checkin(self, member: discord.Member, checked_in_by: str) -> dict:
         """
@@ -87,25 +139,16 @@ class CheckinCog(BaseCog):
         Returns:
             dict with keys: success (bool), message (str), data (dict or None)
         """
-        discord_username = f"{member.name}#{member.discriminator}" if member.discriminator != "0" else member.name
-        
-        payload = {
-            'discord_username': discord_username,
-            'discord_unique_id': member.id,
-            'checked_in_by': checked_in_by
-        }
+        payload = self._checkin_payload(member, checked_in_by)
         
         try:
-            response = requests.post(
-                f"{self.api_url}/api/attendees/checkin/",
-                json=payload,
-                timeout=10
-            )
+            response = await self.backend.post('/api/attendees/checkin/', json=payload)
             
             if response.status_code == 200:
                 data = response.json()
                 
                 if data.get('status') == 'already_checked_in':
+                    self._status_index.mark_checked(member.id, data['checked_in_at'], data['checked_in_by'])
                     return {
                         'success': True,
                         'already_checked': True,
@@ -113,6 +156,7 @@ class CheckinCog(BaseCog):
                         'data': data
                     }
                 else:
+                    self._status_index.mark_checked(member.id, data['attendee']['checked_in_at'], checked_in_by)
                     return {
                         'success': True,
                         'already_checked': False,
@@ -134,7 +178,7 @@ class CheckinCog(BaseCog):
                     'data': None
                 }
                 
-        except requests.exceptions.RequestException as e:
+        except BackendError as e:
             log.error('checkin_api_error', error=str(e), member=member.name)
             return {
                 'success': False,
@@ -142,6 +186,71 @@ class CheckinCog(BaseCog):
                 'data': None
             }
 
+    def _checkin_payload(self, member: discord.Member, checked_in_by: str) -> dict:
+        discord_username = f"{member.name}#{member.discriminator}" if member.discriminator != "0" else member.name
+
+        return {
+            'discord_username': discord_username,
+            'discord_unique_id': member.id,
+            'checked_in_by': checked_in_by
+        }
+
+    async def _bulk_checkin(self, members, checked_in_by: str) -> dict:
+        """
+        Checks in several members at once.
+
+        With BOT_CHECKIN_BULK_ENDPOINT set, a single POST of
+        `{"checkins": [payload, ...]}` is expected to answer
+        `{"results": [{"discord_unique_id": ..., "status": "checked_in" | "already_checked_in" | ...}, ...]}`.
+        Without it (the backend has no bulk endpoint yet), the members are
+        checked in one by one, concurrently.
+
+        Returns:
+            {member_id: bool} whether each member is now checked in
+        """
+        endpoint = self.settings.CHECKIN_BULK_ENDPOINT
+
+        if not endpoint:
+            results = await asyncio.gather(*(self._perform_checkin(member, checked_in_by) for member in members))
+            return {member.id: result['success'] for member, result in zip(members, results)}
+
+        payload = {'checkins': [self._checkin_payload(member, checked_in_by) for member in members]}
+        response = await self.backend.post(endpoint, json=payload)
+
+        if response.status_code != 200:
+            raise BackendError(f"POST {endpoint}: HTTP {response.status_code}")
+
+        checked = {
+            result.get('discord_unique_id'): result.get('status') in ('checked_in', 'already_checked_in')
+            for result in response.json().get('results', [])
+        }
+
+        now = datetime.now(timezone.utc).isoformat()
+        for member_id, success in checked.items():
+            if success:
+                self._status_index.mark_checked(member_id, now, checked_in_by)
+
+        return {member.id: checked.get(member.id, False) for member in members}
+
+    async def _submit_auto_checkins(self, members):
+        """Worker side of the auto check-in queue: one batch, then the cache is updated."""
+        try:
+            results = await self._bulk_checkin(members, 'Auto (Message Activity)')
+        except Exception as e:
+            # Error occurred - the whole batch goes in cooldown
+            log.error('auto_checkin_error', size=len(members), error=str(e))
+            results = {}
+
+        for member in members:
+            if results.get(member.id):
+                # Successfully checked in - cache permanently
+                self._checkins.mark_checked(member.id)
+                log.info('auto_checkin_success', user=str(member), discord_id=member.id)
+            else:
+                # Failed - cooldown before the next attempt
+                self._checkins.mark_failed(member.id)
+                log.debug('auto_checkin_failed', user=str(member))
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """
@@ -167,55 +276,22 @@ class CheckinCog(BaseCog):
         if not message.guild:
             return
         
-        # Check if event is currently active
-        if not self._is_event_active():
-            log.debug('auto_checkin_skipped_event_inactive', user=str(message.author))
-            return
-        
         member = message.author
         member_id = member.id
         
-        # Check if already checked in (permanent state)
-        cache_status = self._checkin_cache.get(member_id)
-        if cache_status == 'checked':
-            return  # Already checked in, no need to do anything
-        
-        # Check if in cooldown period after a failed attempt
-        if isinstance(cache_status, (int, float)):
-            if time.time() - cache_status < self._checkin_cooldown:
-                return  # Still in cooldown
-        
-        # Check if already pending (avoid race conditions)
-        if cache_status == 'pending':
-            return  # Already processing this user
-        
-        # Mark as pending to avoid duplicate requests
-        self._checkin_cache[member_id] = 'pending'
+        # Already checked in, in cooldown after a failed attempt or already being processed
+        if not self._checkins.should_check_in(member_id):
+            return
         
-        try:
-            # Perform the check-in (silent - no DM notification)
-            result = await self._perform_checkin(member, 'Auto (Message Activity)')
-            
-            if result['success']:
-                # Successfully checked in - cache permanently
-                self._checkin_cache[member_id] = 'checked'
-                log.info('auto_checkin_success', user=str(member), discord_id=member_id)
-            else:
-                # Failed - set cooldown timestamp
-                self._checkin_cache[member_id] = time.time()
-                log.debug('auto_checkin_failed', user=str(member), reason=result['message'])
-        except Exception as e:
-            # Error occurred - set cooldown timestamp
-            self._checkin_cache[member_id] = time.time()
-            log.error('auto_checkin_error', user=str(member), error=str(e))
+        # Check if event is currently active
+        if not self._is_event_active():
+            log.debug('auto_checkin_skipped_event_inactive', user=str(message.author))
+            return
         
-        # Clean up old cooldown entries (keep only failures from last hour)
-        current_time = time.time()
-        self._checkin_cache = {
-            k: v for k, v in self._checkin_cache.items()
-            if v == 'checked' or v == 'pending' or 
-            (isinstance(v, (int, float)) and current_time - v < 3600)
-        }
+        # Mark as pending to avoid duplicate requests, the check-in itself (silent - no DM notification)
+        # is done by the queue worker
+        self._checkins.mark_pending(member_id)
+        self._auto_checkins.put(member)
 
     @commands.command(name='checkin')
     @commands.check(is_support_user)
@@ -232,6 +308,7 @@ class CheckinCog(BaseCog):
         result = await self._perform_checkin(member, checked_in_by)
         
         if result['success']:
+            self._checkins.mark_checked(member.id)
             data = result['data']
             if result.get('already_checked'):
                 await ctx.send(
@@ -252,6 +329,118 @@ class CheckinCog(BaseCog):
             else:
                 await ctx.send(f"⚠️ Error checking in {member.mention}: {result['message']}")
 
+    async def _parse_checkin_csv(self, attachment: discord.Attachment):
+        """
+        Reads the Discord ids and emails of a CSV attachment (any column, header allowed).
+
+        Returns:
+            (members, unresolved): members found on the server, and the cells that could not be
+            matched to one, with the reason
+        """
+        content = (await attachment.read()).decode('utf-8-sig', errors='replace')
+        try:
+            dialect = csv.Sniffer().sniff(content[:2048], delimiters=',;\t')
+        except csv.Error:
+            # a single column, or nothing to sniff
+            dialect = csv.excel
+
+        await self.attendees.load()
+
+        members, unresolved = [], []
+
+        for row in csv.reader(io.StringIO(content), dialect):
+            for cell in (c.strip() for c in row):
+                if re.fullmatch(r'\d{15,20}', cell):
+                    member = self.guild.get_member(int(cell))
+                    if member is None:
+                        unresolved.append((cell, 'not on the server'))
+                    else:
+                        members.append(member)
+                elif '@' in cell:
+                    attendee = self.attendees.by_email(cell)
+                    if attendee is None:
+                        unresolved.append((cell, 'unknown email'))
+                    elif not attendee.get('discord_unique_id'):
+                        unresolved.append((cell, 'no Discord account linked'))
+                    else:
+                        member = self.guild.get_member(attendee['discord_unique_id'])
+                        if member is None:
+                            unresolved.append((cell, 'not on the server'))
+                        else:
+                            members.append(member)
+
+        return members, unresolved
+
+    @commands.command(name='checkin_bulk')
+    @commands.check(is_support_user)
+    async def checkin_bulk(self, ctx, members: commands.Greedy[discord.Member]):
+        """
+        Commande: !checkin_bulk
+        Argument: @member [@member ...] and/or an attached CSV of Discord ids / emails
+
+        Check in many attendees at once and report the results in a single embed.
+        Requires Support role.
+        """
+        members = list(members)
+        unresolved = []
+
+        for attachment in ctx.message.attachments:
+            parsed, not_found = await self._parse_checkin_csv(attachment)
+            members.extend(parsed)
+            unresolved.extend(not_found)
+
+        # same member mentioned twice or listed by id and email
+        members = list({member.id: member for member in members}.values())
+
+        if not members and not unresolved:
+            await ctx.send('Usage: !checkin_bulk @member [@member ...] (or attach a CSV of Discord ids / emails)')
+            return
+
+        checked_in_by = f"{ctx.author.name}#{ctx.author.discriminator}" if ctx.author.discriminator != "0" else ctx.author.name
+        pool = asyncio.Semaphore(self.BULK_CHECKIN_CONCURRENCY)
+
+        async def checkin_one(member):
+            async with pool:
+                try:
+                    return member, await self._perform_checkin(member, checked_in_by)
+                except Exception as e:
+                    # one broken check-in must not lose the report of the others
+                    log.error('bulk_checkin_failed', member=member.name, exc_info=e)
+                    return member, {'success': False, 'message': f'{type(e).__name__}: {e}', 'data': None}
+
+        async with ctx.typing():
+            results = await asyncio.gather(*(checkin_one(member) for member in members))
+
+        checked, already, not_found, errors = [], [], [], []
+
+        for member, result in results:
+            if result['success']:
+                self._checkins.mark_checked(member.id)
+                (already if result.get('already_checked') else checked).append(member.mention)
+            elif 'Not found' in result['message']:
+                not_found.append(member.mention)
+            else:
+                errors.append(f"{member.mention}: {result['message']}")
+
+        embed = discord.Embed(
+            title=f"Bulk check-in: {len(checked)} checked in, {len(already)} already, "
+                  f"{len(not_found) + len(errors) + len(unresolved)} failed",
+            color=discord.Color.green() if not (not_found or errors or unresolved) else discord.Color.orange()
+        )
+
+        for name, values in (("✅ Checked in", checked),
+                             ("☑️ Already checked in", already),
+                             ("❌ Not in the attendee database", not_found),
+                             ("⚠️ Errors", errors),
+                             ("❓ Not matched (CSV)", [f"`{cell}`: {reason}" for cell, reason in unresolved])):
+            if values:
+                value = ', '.join(values) if name != "⚠️ Errors" else '\n'.join(values)
+                if len(value) > 1024:
+                    value = value[:1000].rsplit(' ', 1)[0] + ' …'
+                embed.add_field(name=f"{name} ({len(values)})", value=value, inline=False)
+
+        await ctx.send(embed=embed)
+
     @commands.command(name='checkin_status')
     @commands.check(is_support_user)
     async def checkin_status(self, ctx, member: discord.Member = None):
@@ -264,14 +453,17 @@ class CheckinCog(BaseCog):
         """
         
         target = member or ctx.author
+
+        # served from the local index; the API is only asked about attendees it does not know (yet)
+        self._use_status_index()
+        status = self._status_index.get(target.id) if self._status_index.loaded else None
+        if status is not None:
+            await ctx.send(embed=self._status_embed(target, status))
+            return
         
         try:
             # Query the API with discord_unique_id filter
-            response = requests.get(
-                f"{self.api_url}/api/attendees/",
-                params={'discord_unique_id': target.id},
-                timeout=10
-            )
+            response = await self.backend.get('/api/attendees/', params={'discord_unique_id': target.id})
             
             if response.status_code == 200:
                 attendees = response.json()
@@ -285,31 +477,109 @@ class CheckinCog(BaseCog):
                         await ctx.send(f"⚠️ API returned unexpected data for {target.mention}")
                         log.error('checkin_status_mismatch', expected_id=target.id, got_id=attendee.get('discord_unique_id'))
                         return
-                    embed = discord.Embed(
-                        title=f"Check-in Status for {target.display_name}",
-                        color=discord.Color.green() if attendee.get('checked_in_at') else discord.Color.orange()
-                    )
-                    
-                    embed.add_field(name="Name", value=f"{attendee.get('first_name')} {attendee.get('last_name')}", inline=True)
-                    embed.add_field(name="Role", value=attendee.get('role', 'N/A'), inline=True)
-                    
-                    if attendee.get('checked_in_at'):
-                        embed.add_field(name="✅ Checked In", value=attendee['checked_in_at'], inline=False)
-                        if attendee.get('checked_in_by'):
-                            embed.add_field(name="Checked In By", value=attendee['checked_in_by'], inline=True)
-                    else:
-                        embed.add_field(name="Status", value="❌ Not checked in yet", inline=False)
-                    
-                    await ctx.send(embed=embed)
+
+                    await ctx.send(embed=self._status_embed(target, CheckinStatus(attendee)))
                 else:
                     await ctx.send(f"❌ {target.mention} not found in the attendee database.")
             else:
                 await ctx.send("⚠️ Error fetching check-in status from API")
                 
-        except requests.exceptions.RequestException as e:
+        except BackendError as e:
             await ctx.send(f"❌ Failed to connect to the API: {str(e)}")
             log.error('checkin_status_api_error', error=str(e), target=target.name)
 
+    def _status_embed(self, target: discord.Member, status: CheckinStatus) -> discord.Embed:
+        embed = discord.Embed(
+            title=f"Check-in Status for {target.display_name}",
+            color=discord.Color.green() if status.checked_in else discord.Color.orange()
+        )
+        
+        embed.add_field(name="Name", value=status.name, inline=True)
+        embed.add_field(name="Role", value=status.role, inline=True)
+        
+        if status.checked_in:
+            embed.add_field(name="✅ Checked In", value=status.checked_in_at, inline=False)
+            if status.checked_in_by:
+                embed.add_field(name="Checked In By", value=status.checked_in_by, inline=True)
+        else:
+            embed.add_field(name="Status", value="❌ Not checked in yet", inline=False)
+
+        return embed
+
+    def _stats_embed(self) -> discord.Embed:
+        index = self._status_index
+
+        embed = discord.Embed(
+            title=f"Check-in: {index.checked} / {index.total} attendees",
+            color=discord.Color.blue()
+        )
+
+        roles = '\n'.join(f"{role}: {index.checked_by_role[role]} / {total}"
+                          for role, total in sorted(index.totals_by_role.items()) if total)
+        embed.add_field(name="By role", value=roles[:1024] or "-", inline=True)
+
+        team_lines = '\n'.join(f"{team}: {index.checked_by_team[team]} / {total}"
+                               for team, total in sorted(index.totals_by_team.items()) if total)
+        embed.add_field(name="By team", value=team_lines[:1024] or "-", inline=True)
+
+        embed.set_footer(text=f"Updated {datetime.now().strftime('%H:%M:%S')}")
+        return embed
+
+    async def _ensure_status_index(self):
+        self._use_status_index()
+        if not self._status_index.loaded:
+            self._status_index.apply(await self.attendees.load())
+
+    @commands.command(name='checkin_stats')
+    @commands.check(is_support_user)
+    async def checkin_stats(self, ctx):
+        """
+        Commande: !checkin_stats
+        Argument: /
+
+        Check-in totals, per role and per team.
+        Requires Support role.
+        """
+        await self._ensure_status_index()
+        await ctx.send(embed=self._stats_embed())
+
+    @commands.command(name='checkin_dashboard')
+    @commands.check(is_support_user)
+    async def checkin_dashboard(self, ctx):
+        """
+        Commande: !checkin_dashboard
+        Argument: /
+
+        Posts the check-in totals in a message that updates itself as check-ins happen
+        (replaces the previous dashboard). Requires Support role.
+        """
+        await self._ensure_status_index()
+
+        if self._dashboard_task is not None:
+            self._dashboard_task.cancel()
+
+        self._dashboard = await ctx.send(embed=self._stats_embed())
+        self._dashboard_task = asyncio.create_task(self._update_dashboard())
+
+    async def _update_dashboard(self):
+        changed = self._status_index.changed
+
+        while True:
+            await changed.wait()
+            # cleared right before rendering: a change arriving from here on triggers another pass
+            changed.clear()
+
+            try:
+                await self._dashboard.edit(embed=self._stats_embed())
+            except discord.NotFound:
+                log.info('checkin_dashboard_deleted')
+                return
+            except discord.HTTPException as e:
+                log.warning('checkin_dashboard_update_failed', error=str(e))
+
+            # a rush of check-ins only costs one edit per interval
+            await asyncio.sleep(self.DASHBOARD_MIN_INTERVAL)
+
     @checkin.error
     async def checkin_error(self, ctx, error):
         if isinstance(error, commands.MissingRequiredArgument):
@@ -317,6 +587,13 @@ class CheckinCog(BaseCog):
         elif isinstance(error, commands.CheckFailure):
             await ctx.send('❌ You need the Support role to use this command.')
 
+    @checkin_bulk.error
+    async def checkin_bulk_error(self, ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            await ctx.send('❌ You need the Support role to use this command.')
+
+    @checkin_stats.error
+    @checkin_dashboard.error
     @checkin_status.error
     async def checkin_status_error(self, ctx, error):
         if isinstance(error, commands.CheckFailure):
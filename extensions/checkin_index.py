@@ -0,0 +1,145 @@
+import asyncio
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+import structlog
+
+log = structlog.get_logger('checkin_index')
+
+
+class CheckinStatus:
+    __slots__ = ('attendee_id', 'discord_id', 'name', 'role', 'checked_in_at', 'checked_in_by')
+
+    def __init__(self, attendee: dict):
+        self.attendee_id = attendee.get('id')
+        self.discord_id = attendee.get('discord_unique_id')
+        self.name = f"{attendee.get('first_name')} {attendee.get('last_name')}"
+        self.role = attendee.get('role') or 'N/A'
+        self.checked_in_at = attendee.get('checked_in_at')
+        self.checked_in_by = attendee.get('checked_in_by')
+
+    @property
+    def checked_in(self) -> bool:
+        return bool(self.checked_in_at)
+
+
+class CheckinIndex:
+    """
+    Check-in status of every attendee, kept in memory.
+
+    Fed by the attendee list (`apply()`, on the periodic refresh) and by our
+    own check-ins (`mark_checked()`), so status questions and totals are
+    answered without calling the API. The API has no "changed since" filter:
+    `apply()` diffs the downloaded list against the index and only adjusts
+    the counters of the attendees whose status or role changed.
+
+    Attendees are also counted per team: `team_of(discord_id)` gives the team
+    of an attendee when they enter the index, and `set_team()` moves them when
+    their team roles change.
+
+    `changed` is set on every update, for the live dashboard.
+    """
+
+    def __init__(self, team_of: Callable[[int], Optional[str]] = lambda discord_id: None):
+        self.team_of = team_of
+        self._by_attendee_id: Dict[int, CheckinStatus] = {}
+        self._by_discord_id: Dict[int, CheckinStatus] = {}
+        # {discord_id: team name}
+        self._teams: Dict[int, str] = {}
+        # {role: count}
+        self.totals_by_role = Counter()
+        self.checked_by_role = Counter()
+        # {team name: count}
+        self.totals_by_team = Counter()
+        self.checked_by_team = Counter()
+        self.loaded = False
+        self.changed = asyncio.Event()
+
+    @property
+    def total(self) -> int:
+        return sum(self.totals_by_role.values())
+
+    @property
+    def checked(self) -> int:
+        return sum(self.checked_by_role.values())
+
+    def get(self, discord_id: int) -> Optional[CheckinStatus]:
+        return self._by_discord_id.get(discord_id)
+
+    def _add(self, status: CheckinStatus):
+        self._by_attendee_id[status.attendee_id] = status
+        if status.discord_id is not None:
+            self._by_discord_id[status.discord_id] = status
+            self._count_team(status, self.team_of(status.discord_id))
+        self.totals_by_role[status.role] += 1
+        self.checked_by_role[status.role] += status.checked_in
+
+    def _remove(self, status: CheckinStatus):
+        del self._by_attendee_id[status.attendee_id]
+        if status.discord_id is not None and self._by_discord_id.get(status.discord_id) is status:
+            del self._by_discord_id[status.discord_id]
+            self._count_team(status, None)
+        self.totals_by_role[status.role] -= 1
+        self.checked_by_role[status.role] -= status.checked_in
+
+    def _count_team(self, status: CheckinStatus, team: Optional[str]):
+        """Moves the attendee's team counts from their current team to `team` (None: no team)."""
+        previous = self._teams.pop(status.discord_id, None)
+        if previous is not None:
+            self.totals_by_team[previous] -= 1
+            self.checked_by_team[previous] -= status.checked_in
+
+        if team is not None:
+            self._teams[status.discord_id] = team
+            self.totals_by_team[team] += 1
+            self.checked_by_team[team] += status.checked_in
+
+    def set_team(self, discord_id: int, team: Optional[str]):
+        status = self._by_discord_id.get(discord_id)
+        if status is None or self._teams.get(discord_id) == team:
+            return
+
+        self._count_team(status, team)
+        self.changed.set()
+
+    def apply(self, attendees: list) -> int:
+        """Brings the index in line with a fresh attendee list; returns the number of changed attendees."""
+        changes = 0
+        seen = set()
+
+        for attendee in attendees:
+            status = CheckinStatus(attendee)
+            seen.add(status.attendee_id)
+            current = self._by_attendee_id.get(status.attendee_id)
+
+            if current is not None:
+                if (current.discord_id, current.role, current.checked_in_at, current.name) == \
+                        (status.discord_id, status.role, status.checked_in_at, status.name):
+                    continue
+                self._remove(current)
+
+            self._add(status)
+            changes += 1
+
+        for attendee_id in [a for a in self._by_attendee_id if a not in seen]:
+            self._remove(self._by_attendee_id[attendee_id])
+            changes += 1
+
+        self.loaded = True
+        if changes:
+            self.changed.set()
+        log.debug('check-in index refreshed', changes=changes, total=self.total, checked=self.checked)
+        return changes
+
+    def mark_checked(self, discord_id: int, checked_in_at: str, checked_in_by: Optional[str] = None):
+        status = self._by_discord_id.get(discord_id)
+        if status is None or status.checked_in:
+            return
+
+        self.checked_by_role[status.role] += 1
+        team = self._teams.get(discord_id)
+        if team is not None:
+            self.checked_by_team[team] += 1
+        status.checked_in_at = checked_in_at
+        status.checked_in_by = checked_in_by
+        self.changed.set()
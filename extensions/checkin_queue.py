@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import discord
+import structlog
+
+log = structlog.get_logger('checkin_queue')
+
+
+class AutoCheckinQueue:
+    """
+    Collects the members to check in automatically and hands them to
+    `submit_batch` in batches, from a background worker.
+
+    The message listener only enqueues (no API call on the hot path). The
+    worker waits for a first member, then keeps collecting for up to
+    `max_delay` seconds or until `batch_size` members are queued, so an
+    opening rush of hundreds of first messages becomes a few bulk requests.
+    """
+
+    def __init__(self, submit_batch: Callable[[List[discord.Member]], Awaitable[None]],
+                 batch_size: int = 50, max_delay: float = 1.0):
+        self.submit_batch = submit_batch
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+        self.batches_sent = 0
+        self.members_submitted = 0
+
+    def start(self):
+        if self._worker_task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        if self._worker_task is None:
+            return
+        self._worker_task.cancel()
+        await asyncio.gather(self._worker_task, return_exceptions=True)
+        self._worker_task = None
+
+    def put(self, member: discord.Member):
+        self.start()
+        self._queue.put_nowait(member)
+
+    @property
+    def backlog(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+
+            try:
+                await self.submit_batch(batch)
+            except Exception as e:
+                log.error('auto check-in batch crashed', size=len(batch), exc_info=e)
+
+            self.batches_sent += 1
+            self.members_submitted += len(batch)
@@ -0,0 +1,166 @@
+import asyncio
+import enum
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional
+
+import structlog
+
+log = structlog.get_logger('checkin_store')
+
+
+class CheckinState(enum.Enum):
+    CHECKED = 'checked'
+    PENDING = 'pending'
+    FAILED = 'failed'
+
+
+class CheckinEntry:
+    __slots__ = ('state', 'at')
+
+    def __init__(self, state: CheckinState, at: float):
+        self.state = state
+        # when the member entered this state (time.time())
+        self.at = at
+
+
+class CheckinStore:
+    """
+    Auto check-in state of the members.
+
+    - CHECKED: the member is checked in, no more API call for them.
+    - PENDING: a check-in is queued or in flight; expires after `pending_ttl`
+      in case the worker died with it.
+    - FAILED: the last attempt failed; no retry before `failure_cooldown`,
+      forgotten after `failure_ttl`.
+
+    Each state lives in its own OrderedDict in insertion order, and every
+    entry of a state has the same lifetime, so the oldest entry is always the
+    first to expire: `expire()` only pops from the front. The store holds at
+    most `max_entries` members; beyond that the oldest transient entries go
+    first, then the oldest checked ones (which only costs one API call
+    answering "already checked in").
+
+    The checked members are snapshotted to a SQLite file so a restarted bot
+    does not check everyone in again.
+    """
+
+    def __init__(self, path: Optional[str] = None, failure_cooldown: float = 300, failure_ttl: float = 3600,
+                 pending_ttl: float = 600, max_entries: int = 5000):
+        self.path = path
+        self.failure_cooldown = failure_cooldown
+        self.ttl = {CheckinState.PENDING: pending_ttl, CheckinState.FAILED: failure_ttl}
+        self.max_entries = max_entries
+        self._states = {state: OrderedDict() for state in CheckinState}
+        # member_id -> CheckinState, to find an entry without looking in every state
+        self._index = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def count(self, state: CheckinState) -> int:
+        return len(self._states[state])
+
+    def get(self, member_id: int) -> Optional[CheckinEntry]:
+        state = self._index.get(member_id)
+        if state is None:
+            return None
+
+        entry = self._states[state][member_id]
+        ttl = self.ttl.get(state)
+        if ttl is not None and time.time() - entry.at >= ttl:
+            self._remove(member_id)
+            return None
+        return entry
+
+    def should_check_in(self, member_id: int) -> bool:
+        entry = self.get(member_id)
+        if entry is None:
+            return True
+        if entry.state is CheckinState.FAILED:
+            return time.time() - entry.at >= self.failure_cooldown
+        return False
+
+    def _set(self, member_id: int, state: CheckinState, at: Optional[float] = None):
+        self._remove(member_id)
+        self._states[state][member_id] = CheckinEntry(state, time.time() if at is None else at)
+        self._index[member_id] = state
+        if len(self._index) > self.max_entries:
+            self._evict()
+
+    def mark_pending(self, member_id: int):
+        self._set(member_id, CheckinState.PENDING)
+
+    def mark_checked(self, member_id: int, at: Optional[float] = None):
+        self._set(member_id, CheckinState.CHECKED, at)
+
+    def mark_failed(self, member_id: int):
+        self._set(member_id, CheckinState.FAILED)
+
+    def _remove(self, member_id: int):
+        state = self._index.pop(member_id, None)
+        if state is not None:
+            del self._states[state][member_id]
+
+    def _evict(self):
+        for state in (CheckinState.FAILED, CheckinState.PENDING, CheckinState.CHECKED):
+            entries = self._states[state]
+            while entries and len(self._index) > self.max_entries:
+                member_id, _ = entries.popitem(last=False)
+                del self._index[member_id]
+
+    def expire(self) -> int:
+        """Drops the expired transient entries; returns how many."""
+        now = time.time()
+        removed = 0
+        for state, ttl in self.ttl.items():
+            entries = self._states[state]
+            while entries:
+                member_id, entry = next(iter(entries.items()))
+                if now - entry.at < ttl:
+                    break
+                entries.popitem(last=False)
+                del self._index[member_id]
+                removed += 1
+        return removed
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute('CREATE TABLE IF NOT EXISTS checkins (member_id INTEGER PRIMARY KEY, checked_at REAL)')
+        return connection
+
+    def load(self):
+        """Restores the checked members of the last snapshot."""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with closing(self._connect()) as connection:
+                rows = connection.execute('SELECT member_id, checked_at FROM checkins ORDER BY checked_at').fetchall()
+        except sqlite3.Error as e:
+            log.error('could not load check-in snapshot', path=self.path, exc_info=e)
+            return
+
+        for member_id, checked_at in rows:
+            self.mark_checked(member_id, checked_at)
+        log.info('check-in snapshot loaded', path=self.path, checked=len(rows))
+
+    async def snapshot(self):
+        """Writes the checked members to the snapshot file, from a thread."""
+        if not self.path:
+            return
+
+        rows = [(member_id, entry.at) for member_id, entry in self._states[CheckinState.CHECKED].items()]
+        await asyncio.to_thread(self._write_snapshot, rows)
+
+    def _write_snapshot(self, rows):
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute('DELETE FROM checkins')
+                connection.executemany('INSERT INTO checkins (member_id, checked_at) VALUES (?, ?)', rows)
+        except sqlite3.Error as e:
+            log.error('could not write check-in snapshot', path=self.path, exc_info=e)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import structlog
+
+from .backend import BackendError
+
+log = structlog.get_logger('event_window')
+
+
+def parse_event_date(value: str, end=False) -> datetime:
+    """ISO date or datetime to an aware datetime; a bare date covers the whole day (local time)."""
+    parsed = datetime.fromisoformat(value)
+    if len(value) == 10 and end:
+        parsed += timedelta(days=1)
+    # naive values are local times
+    return parsed if parsed.tzinfo is not None else parsed.astimezone()
+
+
+class EventWindow:
+    """
+    Start/end of the event, for the auto check-in.
+
+    The window comes from the settings (EVENT_START_DATE / EVENT_END_DATE)
+    or, when BOT_EVENT_ENDPOINT is set, from that API endpoint. `is_active()`
+    is a plain time comparison: the endpoint is reloaded in the background
+    every `ttl` seconds, and after a failure the previous window (or the
+    permissive default) is kept and the next attempt is delayed with an
+    exponential backoff instead of retrying on every message.
+
+    Without any window the event is considered active (auto check-in is
+    allowed at any time, as before).
+    """
+
+    MIN_BACKOFF = 30
+    MAX_BACKOFF = 1800
+
+    def __init__(self, backend, settings, ttl: float = 3600):
+        self.backend = backend
+        self.settings = settings
+        self.ttl = ttl
+        self.window: Optional[Tuple[datetime, datetime]] = None
+        self._next_refresh = 0.0
+        self._backoff = self.MIN_BACKOFF
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        if settings.EVENT_START_DATE and settings.EVENT_END_DATE:
+            try:
+                self.window = (parse_event_date(settings.EVENT_START_DATE),
+                               parse_event_date(settings.EVENT_END_DATE, end=True))
+            except ValueError as e:
+                log.error('invalid event dates in settings', error=str(e))
+
+    @property
+    def endpoint(self):
+        return self.settings.EVENT_ENDPOINT.format(code=self.settings.EVENT_CODE)
+
+    def is_active(self, now: Optional[datetime] = None) -> bool:
+        if self.settings.EVENT_ENDPOINT and time.monotonic() >= self._next_refresh and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+        if self.window is None:
+            return True
+
+        start, end = self.window
+        now = now or datetime.now().astimezone()
+        return start <= now < end
+
+    async def refresh(self):
+        try:
+            event = await self.backend.get_json(self.endpoint)
+            if isinstance(event, list):
+                event = next((e for e in event if e.get('code', self.settings.EVENT_CODE) == self.settings.EVENT_CODE),
+                             {})
+
+            if event.get('start_date') and event.get('end_date'):
+                self.window = (parse_event_date(event['start_date']), parse_event_date(event['end_date'], end=True))
+            else:
+                # the event has no dates: keep the configured window or the permissive default
+                log.info('event has no dates', endpoint=self.endpoint)
+
+            self._next_refresh = time.monotonic() + self.ttl
+            self._backoff = self.MIN_BACKOFF
+            log.debug('event window loaded', window=self.window)
+        except (BackendError, ValueError, KeyError, AttributeError) as e:
+            # negative cache: no new attempt before the backoff
+            self._next_refresh = time.monotonic() + self._backoff
+            log.warning('event_dates_check_failed', error=str(e), retry_in=self._backoff)
+            self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+        finally:
+            self._refresh_task = None
+
+    def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
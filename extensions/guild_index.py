@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional
+
+import discord
+import structlog
+
+log = structlog.get_logger()
+
+
+class GuildIndex:
+    """
+    Name index over the roles and channels of the guild.
+
+    Lookups are dict accesses instead of scans of `guild.roles` /
+    `guild.channels`. UtilsCog invalidates the index from the guild events
+    (role and channel create/update/delete) and it is rebuilt on the next
+    lookup, so results are always those of the current guild state.
+
+    As with `discord.utils.get`, when several objects share a name the one
+    with the lowest position wins.
+    """
+
+    def __init__(self):
+        self.guild: Optional[discord.Guild] = None
+        self._roles: Dict[str, List[discord.Role]] = {}
+        self._roles_folded: Dict[str, List[discord.Role]] = {}
+        self._channels: Dict[str, list] = {}
+        self._channels_folded: Dict[str, list] = {}
+        self._stale = True
+        # bumped whenever the roles may have changed, for the caches built on role ids
+        self.role_generation = 0
+
+    def attach(self, guild: Optional[discord.Guild]):
+        self.guild = guild
+        self.invalidate()
+
+    def invalidate(self, roles=True):
+        self._stale = True
+        if roles:
+            self.role_generation += 1
+
+    def _rebuild(self):
+        self._roles, self._roles_folded = self._index(self.guild.roles if self.guild else [])
+        self._channels, self._channels_folded = self._index(
+            sorted(self.guild.channels, key=lambda c: (c.position, c.id)) if self.guild else [])
+        self._stale = False
+        log.debug('guild index rebuilt', roles=len(self._roles), channels=len(self._channels))
+
+    @staticmethod
+    def _index(objects):
+        exact, folded = {}, {}
+        for obj in objects:
+            exact.setdefault(obj.name, []).append(obj)
+            folded.setdefault(obj.name.lower(), []).append(obj)
+        return exact, folded
+
+    def role(self, name: str, case_insensitive=False) -> Optional[discord.Role]:
+        if self._stale:
+            self._rebuild()
+        roles = self._roles_folded.get(name.lower()) if case_insensitive else self._roles.get(name)
+        return roles[0] if roles else None
+
+    def channel(self, name: str, case_insensitive=False, channel_type=None, category=None):
+        """First channel named `name`, optionally restricted to a channel class and/or a category."""
+        if self._stale:
+            self._rebuild()
+        channels = self._channels_folded.get(name.lower()) if case_insensitive else self._channels.get(name)
+        for channel in channels or ():
+            if channel_type is not None and not isinstance(channel, channel_type):
+                continue
+            if category is not None and channel.category_id != category.id:
+                continue
+            return channel
+        return None
+
+    def text_channel(self, name: str, case_insensitive=False, category=None) -> Optional[discord.TextChannel]:
+        return self.channel(name, case_insensitive, discord.TextChannel, category)
+
+    def voice_channel(self, name: str, case_insensitive=False, category=None) -> Optional[discord.VoiceChannel]:
+        return self.channel(name, case_insensitive, discord.VoiceChannel, category)
+
+    def category(self, name: str, case_insensitive=False) -> Optional[discord.CategoryChannel]:
+        return self.channel(name, case_insensitive, discord.CategoryChannel)
@@ -1,5 +1,3 @@
-from functools import cached_property
-
 import discord
 from discord.ext import commands
 
@@ -14,11 +12,11 @@ class HelpCog(BaseCog):
     async def cog_load(self):
         await super().cog_load()
 
-    @cached_property
+    @property
     def channel_help(self) -> discord.TextChannel:
         return self.settings.get_channel('HELP')
 
-    @cached_property
+    @property
     def channel_support(self) -> discord.TextChannel:
         return self.settings.get_channel('SUPPORT')
 
@@ -71,7 +69,7 @@ class HelpCog(BaseCog):
         Appelle à l'aide un organisateur dans le salon "demande d'aide"
         """
 
-        organisateurs = discord.utils.find(lambda c: c.name == self.settings.ORGA_ROLE, self.guild.roles)
+        organisateurs = self.settings.get_role('ORGA')
 
         await self.channel_help.send(
             f"{ctx.author.mention} appelle le groupe {organisateurs.mention} à l'aide dans le salon {ctx.message.channel.mention} !")
@@ -82,7 +80,7 @@ class HelpCog(BaseCog):
         """
         Appelle à l'aide un coach dans le salon "demande d'aide"
         """
-        organisateurs = discord.utils.find(lambda c: c.name == self.settings.COACH_ROLE, self.guild.roles)
+        organisateurs = self.settings.get_role('COACH')
 
         await self.channel_help.send(
             f"{ctx.author.mention} appelle le groupe {organisateurs.mention} à l'aide dans le salon {ctx.message.channel.mention} !")
@@ -93,7 +91,7 @@ class HelpCog(BaseCog):
         """
         Appelle à l'aide un support dans le salon "support technique"
         """
-        organisateurs = discord.utils.find(lambda c: c.name == self.settings.ADMIN_ROLE, self.guild.roles)
+        organisateurs = self.settings.get_role('ADMIN')
 
         await self.channel_support.send(
             f"{ctx.author.mention} appelle le groupe {organisateurs.mention} à l'aide dans le salon {ctx.message.channel.mention} !")
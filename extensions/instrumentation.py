@@ -0,0 +1,139 @@
+import contextvars
+import time
+
+import structlog
+
+from . import metrics
+
+log = structlog.get_logger('instrumentation')
+
+# listeners slower than this are logged individually (commands are always logged)
+SLOW_LISTENER = 0.5
+
+
+class CallStats:
+    """Calls made while handling one command or event; shared by the tasks it spawns through the context."""
+
+    __slots__ = ('discord_calls', 'backend_calls')
+
+    def __init__(self):
+        self.discord_calls = 0
+        self.backend_calls = 0
+
+
+class Aggregate:
+    __slots__ = ('count', 'errors', 'total_time', 'max_time', 'discord_calls', 'backend_calls')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.discord_calls = 0
+        self.backend_calls = 0
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+
+current_stats: contextvars.ContextVar = contextvars.ContextVar('current_stats', default=None)
+
+# {('command' | 'listener', name): Aggregate}
+aggregates = {}
+
+
+def count_discord_call():
+    stats = current_stats.get()
+    if stats is not None:
+        stats.discord_calls += 1
+
+
+def count_backend_call():
+    stats = current_stats.get()
+    if stats is not None:
+        stats.backend_calls += 1
+
+
+def record(kind, name, duration, stats: CallStats, failed=False):
+    aggregate = aggregates.get((kind, name))
+    if aggregate is None:
+        aggregate = aggregates[(kind, name)] = Aggregate()
+
+    aggregate.count += 1
+    aggregate.errors += failed
+    aggregate.total_time += duration
+    aggregate.max_time = max(aggregate.max_time, duration)
+    aggregate.discord_calls += stats.discord_calls
+    aggregate.backend_calls += stats.backend_calls
+
+    if kind == 'command':
+        metrics.COMMAND_INVOCATIONS.inc(command=name, status='error' if failed else 'ok')
+        metrics.COMMAND_DURATION.observe(duration, command=name)
+    else:
+        metrics.LISTENER_DURATION.observe(duration, event=name)
+
+    if kind == 'command' or duration > SLOW_LISTENER or failed:
+        log.info(f'{kind} timing', name=name, duration=round(duration, 4), failed=failed,
+                 discord_calls=stats.discord_calls, backend_calls=stats.backend_calls)
+
+
+def slowest(count=10, kind=None):
+    entries = [(k, a) for k, a in aggregates.items() if kind is None or k[0] == kind]
+    return sorted(entries, key=lambda e: e[1].max_time, reverse=True)[:count]
+
+
+def install(bot):
+    """Hooks the instrumentation into the bot: command before/after hooks, event dispatch and Discord REST calls."""
+    if getattr(bot, 'instrumented', False):
+        return
+    bot.instrumented = True
+
+    @bot.before_invoke
+    async def before_invoke(ctx):
+        ctx.call_stats = CallStats()
+        ctx.call_started_at = time.monotonic()
+        current_stats.set(ctx.call_stats)
+
+    @bot.after_invoke
+    async def after_invoke(ctx):
+        started_at = getattr(ctx, 'call_started_at', None)
+        if started_at is None:
+            return
+        record('command', ctx.command.qualified_name, time.monotonic() - started_at, ctx.call_stats,
+               failed=ctx.command_failed)
+
+    # every REST call of discord.py goes through HTTPClient.request
+    http_request = bot.http.request
+
+    async def counted_request(*args, **kwargs):
+        count_discord_call()
+        return await http_request(*args, **kwargs)
+
+    bot.http.request = counted_request
+
+    # every event handler (bot.event and cog listeners) is run through Client._run_event in its own task
+    run_event = bot._run_event
+
+    async def timed_run_event(coro, event_name, *args, **kwargs):
+        stats = CallStats()
+        current_stats.set(stats)
+        started_at = time.monotonic()
+        failed = False
+
+        # _run_event reports the listener's exceptions itself, so they are spotted before it swallows them
+        async def watched(*a, **kw):
+            nonlocal failed
+            try:
+                return await coro(*a, **kw)
+            except Exception:
+                failed = True
+                raise
+
+        try:
+            await run_event(watched, event_name, *args, **kwargs)
+        finally:
+            record('listener', f'{event_name}:{getattr(coro, "__qualname__", coro)}', time.monotonic() - started_at,
+                   stats, failed=failed)
+
+    bot._run_event = timed_run_event
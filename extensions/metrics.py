@@ -0,0 +1,166 @@
+import bisect
+import re
+import time
+from collections import deque
+
+# minimal Prometheus-style metrics, rendered in the text exposition format by `render()`
+
+_REGISTRY = []
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = function
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            yield f'{self.name} {self._function()}'
+            return
+        for key, value in self._values.items():
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # {labels: [bucket counts..., sum, count]}
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        data = self._values.get(key)
+        if data is None:
+            data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            data[index] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    def _samples(self):
+        for key, data in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", bound))} {cumulative}'
+            yield f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", "+Inf"))} {data[-1]}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {data[-2]}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, key)} {data[-1]}'
+
+
+class Summary(_Metric):
+    """Quantiles over the last `window` observations (no labels)."""
+    type = 'summary'
+
+    def __init__(self, name, documentation, quantiles=(0.5, 0.9, 0.99), window=1200):
+        super().__init__(name, documentation)
+        self.quantiles = quantiles
+        self._samples_window = deque(maxlen=window)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value):
+        self._samples_window.append(value)
+        self._sum += value
+        self._count += 1
+
+    def quantile(self, q):
+        if not self._samples_window:
+            return 0.0
+        ordered = sorted(self._samples_window)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def _samples(self):
+        ordered = sorted(self._samples_window)
+        for q in self.quantiles:
+            value = ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+            yield f'{self.name}{_format_labels(("quantile",), (q,))} {value}'
+        yield f'{self.name}_sum {self._sum}'
+        yield f'{self.name}_count {self._count}'
+
+
+def render():
+    return '\n'.join(metric.render() for metric in _REGISTRY) + '\n'
+
+
+def endpoint_label(path):
+    """Collapses ids in an API path so each endpoint is a single label value (`/api/attendees/:id/`)."""
+    return re.sub(r'/\d+(?=/|$)', '/:id', path.split('?', 1)[0])
+
+
+STARTED_AT = time.time()
+
+COMMAND_INVOCATIONS = Counter('bot_command_invocations_total', 'Commands invoked', ('command', 'status'))
+COMMAND_ERRORS = Counter('bot_command_errors_total', 'Command errors, by exception type', ('command', 'error'))
+COMMAND_DURATION = Histogram('bot_command_duration_seconds', 'Command wall time', ('command',))
+LISTENER_DURATION = Histogram('bot_listener_duration_seconds', 'Event listener wall time', ('event',))
+BACKEND_REQUESTS = Histogram('bot_backend_request_duration_seconds', 'hic-manager API call latency',
+                             ('method', 'endpoint', 'status'))
+RATE_LIMIT_HITS = Counter('bot_discord_rate_limit_hits_total', 'Discord 429 responses', ('scope',))
+LOOP_LAG = Summary('bot_event_loop_lag_seconds', 'Delay of the event loop in running a scheduled callback')
+LOOP_STALLS = Counter('bot_event_loop_stalls_total', 'Event loop stalls longer than the watchdog threshold')
+WS_LATENCY = Gauge('bot_gateway_latency_seconds', 'Discord gateway heartbeat latency')
+STARTUP_DURATION = Gauge('bot_startup_seconds', 'Time spent in each startup phase of the bot process', ('phase',))
+UPTIME = Gauge('bot_uptime_seconds', 'Seconds since the bot process started', function=lambda: time.time() - STARTED_AT)
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import math
+import time
+
+import structlog
+from aiohttp import web
+from discord.ext import commands
+
+from . import instrumentation, metrics, perms
+from .watchdog import StallWatchdog
+from .base_cog import BaseCog
+
+log = structlog.get_logger('monitoring')
+
+
+class _RateLimitLogHandler(logging.Handler):
+    """discord.py only reports 429s through its logger: count them."""
+
+    def emit(self, record):
+        message = record.getMessage().lower()
+        if 'rate limit' in message and ('429' in message or 'global' in message):
+            metrics.RATE_LIMIT_HITS.inc(scope='global' if 'global' in message else 'route')
+
+
+class MonitoringCog(BaseCog):
+    """
+    Serves /health and /metrics (Prometheus text format) on localhost for the
+    web app, samples the event loop lag, reports loop stalls with the blocking
+    stack to the bot log channel and installs the per command/listener
+    instrumentation.
+    """
+
+    LAG_SAMPLE_INTERVAL = 0.25
+    # at most one stall report per interval is posted to the bot log channel, the others are only logged
+    STALL_REPORT_COOLDOWN = 60
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self._runner = None
+        self._lag_sampler = None
+        self._rate_limit_handler = _RateLimitLogHandler()
+        self._watchdog = None
+        self._last_stall_report = 0.0
+
+    async def cog_load(self):
+        await super().cog_load()
+
+        metrics.WS_LATENCY.set_function(self._gateway_latency)
+        instrumentation.install(self.bot)
+        logging.getLogger('discord.http').addHandler(self._rate_limit_handler)
+        self._watchdog = StallWatchdog(self.settings.STALL_THRESHOLD, self._on_stall)
+        self._watchdog.start()
+        self._lag_sampler = asyncio.create_task(self._sample_loop_lag())
+
+        app = web.Application()
+        app.router.add_get('/health', self.health_handler)
+        app.router.add_get('/metrics', self.metrics_handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', self.settings.METRICS_PORT).start()
+        log.debug('monitoring: ready', port=self.settings.METRICS_PORT)
+
+    async def cog_unload(self):
+        logging.getLogger('discord.http').removeHandler(self._rate_limit_handler)
+        if self._lag_sampler is not None:
+            self._lag_sampler.cancel()
+        if self._watchdog is not None:
+            self._watchdog.stop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _gateway_latency(self):
+        # discord.py reports inf/nan until the first heartbeat is acknowledged
+        latency = self.bot.latency
+        return latency if math.isfinite(latency) else 0.0
+
+    async def _sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.LAG_SAMPLE_INTERVAL
+            await asyncio.sleep(self.LAG_SAMPLE_INTERVAL)
+            metrics.LOOP_LAG.observe(max(loop.time() - expected, 0.0))
+            self._watchdog.beat()
+
+    def _on_stall(self, duration, stack):
+        metrics.LOOP_STALLS.inc()
+        log.warning('event loop was blocked', duration=round(duration, 3), stack=stack)
+
+        now = time.monotonic()
+        if now - self._last_stall_report < self.STALL_REPORT_COOLDOWN:
+            return
+        self._last_stall_report = now
+
+        # the innermost frames are the interesting ones
+        excerpt = stack[-1800:]
+        asyncio.create_task(self.utils_cog.bot_log_message(
+            f":warning: Boucle d'événements bloquée pendant {duration:.1f}s :\n```\n{excerpt}\n```"))
+
+    async def health_handler(self, request):
+        healthy = self.bot.is_ready() and not self.bot.is_closed()
+        body = {
+            "status": "ok" if healthy else "starting",
+            "gateway_latency": self._gateway_latency(),
+            "loop_lag_p50": metrics.LOOP_LAG.quantile(0.5),
+            "loop_lag_p99": metrics.LOOP_LAG.quantile(0.99),
+            "loop_stalls": metrics.LOOP_STALLS.value(),
+            "uptime": time.time() - metrics.STARTED_AT,
+            "time_to_ready": getattr(self.bot, 'time_to_ready', None),
+        }
+        return web.json_response(body, status=200 if healthy else 503)
+
+    async def metrics_handler(self, request):
+        return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8')
+
+    @commands.command(name='slowest')
+    @commands.check(perms.is_support_user)
+    async def slowest(self, ctx, count: int = 10):
+        """
+        Commande: !slowest
+        Argument: [nombre] (défaut 10)
+
+        (Support uniquement) Affiche les commandes et listeners les plus lents depuis le démarrage.
+        """
+        lines = ["```", f"{'name':<45} {'n':>5} {'err':>4} {'max(s)':>7} {'avg(s)':>7} {'rest':>5} {'api':>5}"]
+
+        for (kind, name), aggregate in instrumentation.slowest(count):
+            label = f"!{name}" if kind == 'command' else name
+            lines.append(f"{label[:45]:<45} {aggregate.count:>5} {aggregate.errors:>4} "
+                         f"{aggregate.max_time:>7.2f} {aggregate.mean_time:>7.2f} "
+                         f"{aggregate.discord_calls / aggregate.count:>5.1f} "
+                         f"{aggregate.backend_calls / aggregate.count:>5.1f}")
+
+        lines.append("```")
+        await ctx.send('\n'.join(lines)[:2000])
+
+
+async def setup(bot):
+    await bot.add_cog(MonitoringCog(bot))
@@ -0,0 +1,210 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import discord
+import structlog
+
+log = structlog.get_logger('mutations')
+
+_MISSING = object()
+
+
+class _PendingEdit:
+    def __init__(self, member: discord.Member):
+        self.member = member
+        self.add_roles: Dict[int, discord.Role] = {}
+        self.remove_roles: Dict[int, discord.Role] = {}
+        self.nick = _MISSING
+        # (future, wants_roles, wants_nick)
+        self.waiters = []
+
+
+class MemberMutationQueue:
+    """
+    Coalesces role additions/removals and nickname changes for the same member
+    into a single `member.edit` call.
+
+    `member.edit(roles=...)` replaces the whole role list, computed from the
+    cached roles of the member. The edits of a member are therefore never in
+    flight at the same time (a member already being edited is deferred until
+    its edit is done), and after an edit its response is used as the role base
+    instead of the cache, which the gateway may not have updated yet. As soon
+    as the gateway updates the member (our edit arriving, or a change made
+    outside the queue, e.g. by an admin) `member_updated()` drops that
+    response and the cache is authoritative again; `EDITED_TTL` bounds it in
+    case the update never comes.
+
+    Changes submitted for a member within `coalesce_delay` seconds are merged,
+    then applied by a small pool of workers. discord.py already waits on the
+    per-route rate-limit buckets; the bounded pool keeps us from queuing
+    hundreds of requests behind them during bulk onboarding.
+    """
+
+    # how long the response of an edit is trusted over the member cache (seconds)
+    EDITED_TTL = 10
+
+    def __init__(self, coalesce_delay: float = 0.5, workers: int = 2):
+        self.coalesce_delay = coalesce_delay
+        self.worker_count = workers
+        self._pending: Dict[int, _PendingEdit] = {}
+        # member_id -> edit being applied
+        self._in_flight: Dict[int, _PendingEdit] = {}
+        # member ids that got new changes while being edited, requeued once the edit is done
+        self._deferred = set()
+        # member_id -> (time.monotonic(), member returned by the last edit), oldest first
+        self._edited: OrderedDict = OrderedDict()
+        self._ready: Optional[asyncio.Queue] = None
+        self._workers = []
+        self.edits_sent = 0
+        self.changes_submitted = 0
+
+    def start(self):
+        if self._workers:
+            return
+        self._ready = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # nobody will apply these changes anymore: wake up whoever awaits them
+        for pending in [*self._in_flight.values(), *self._pending.values()]:
+            for future, _, _ in pending.waiters:
+                future.cancel()
+        self._in_flight.clear()
+        self._pending.clear()
+        self._deferred.clear()
+
+    def submit(self, member: discord.Member, add_roles: Iterable[discord.Role] = (),
+               remove_roles: Iterable[discord.Role] = (), nick=_MISSING) -> asyncio.Future:
+        """
+        Queues changes for a member. The returned future resolves to True once the
+        requested changes are applied, or False if Discord refused them.
+        """
+        self.start()
+
+        pending = self._pending.get(member.id)
+
+        if pending is None:
+            pending = self._pending[member.id] = _PendingEdit(member)
+            asyncio.get_running_loop().call_later(self.coalesce_delay, self._ready.put_nowait, member.id)
+
+        # keep the most recent member object, its role cache is the freshest
+        pending.member = member
+
+        for role in add_roles:
+            pending.remove_roles.pop(role.id, None)
+            pending.add_roles[role.id] = role
+
+        for role in remove_roles:
+            pending.add_roles.pop(role.id, None)
+            pending.remove_roles[role.id] = role
+
+        if nick is not _MISSING:
+            pending.nick = nick
+
+        future = asyncio.get_running_loop().create_future()
+        pending.waiters.append((future, bool(add_roles or remove_roles), nick is not _MISSING))
+        self.changes_submitted += 1
+
+        return future
+
+    async def edit(self, member: discord.Member, add_roles: Iterable[discord.Role] = (),
+                   remove_roles: Iterable[discord.Role] = (), nick=_MISSING) -> bool:
+        return await self.submit(member, add_roles=list(add_roles), remove_roles=list(remove_roles), nick=nick)
+
+    async def _worker(self):
+        while True:
+            member_id = await self._ready.get()
+
+            if member_id in self._in_flight:
+                self._deferred.add(member_id)
+                continue
+
+            pending = self._pending.pop(member_id, None)
+
+            if pending is None:
+                continue
+
+            self._in_flight[member_id] = pending
+            try:
+                roles_ok, nick_ok = await self._apply(pending)
+            except Exception as e:
+                log.error('member edit crashed', member=pending.member.name, exc_info=e)
+                roles_ok = nick_ok = False
+            finally:
+                self._in_flight.pop(member_id, None)
+                if member_id in self._deferred:
+                    self._deferred.discard(member_id)
+                    self._ready.put_nowait(member_id)
+
+            for future, wants_roles, wants_nick in pending.waiters:
+                if not future.done():
+                    future.set_result((roles_ok or not wants_roles) and (nick_ok or not wants_nick))
+
+    def _remember_edit(self, member_id: int, edited: Optional[discord.Member]):
+        self._edited.pop(member_id, None)
+        if edited is not None:
+            self._edited[member_id] = (time.monotonic(), edited)
+
+        expired = time.monotonic() - self.EDITED_TTL
+        while self._edited and next(iter(self._edited.values()))[0] < expired:
+            self._edited.popitem(last=False)
+
+    def member_updated(self, member_id: int):
+        """The gateway updated the member: its cached roles are current again."""
+        self._edited.pop(member_id, None)
+
+    def _role_base(self, member: discord.Member) -> discord.Member:
+        """The member whose roles the edit starts from: our last edit's response while the cache may lag behind."""
+        edited_at, edited = self._edited.get(member.id, (None, None))
+        if edited is not None and time.monotonic() - edited_at < self.EDITED_TTL:
+            return edited
+        return member
+
+    async def _apply(self, pending: _PendingEdit):
+        member = pending.member
+
+        current = {r.id: r for r in self._role_base(member).roles if not r.is_default()}
+        roles = dict(current)
+
+        for role_id in pending.remove_roles:
+            roles.pop(role_id, None)
+        roles.update(pending.add_roles)
+
+        changes = {}
+
+        if roles.keys() != current.keys():
+            changes['roles'] = list(roles.values())
+
+        if pending.nick is not _MISSING and pending.nick != member.nick:
+            changes['nick'] = pending.nick
+
+        if not changes:
+            return True, True
+
+        try:
+            self._remember_edit(member.id, await member.edit(**changes))
+            self.edits_sent += 1
+            log.debug('member edited', member=member.name, changes=list(changes.keys()))
+            return True, True
+        except discord.Forbidden:
+            if 'roles' in changes and 'nick' in changes:
+                # typically a member above the bot in the hierarchy: the nick is refused, retry the roles alone
+                log.warning('member edit forbidden, retrying roles only', member=member.name)
+                try:
+                    self._remember_edit(member.id, await member.edit(roles=changes['roles']))
+                    self.edits_sent += 1
+                    return True, False
+                except discord.Forbidden:
+                    pass
+            log.warning('member edit forbidden', member=member.name, changes=list(changes.keys()))
+            return False, False
+        except discord.HTTPException as e:
+            log.error('member edit failed', member=member.name, status=e.status, exc_info=e)
+            return False, False
@@ -1,27 +1,89 @@
+from typing import Dict, FrozenSet
+
+import discord
 import structlog
 
 log = structlog.get_logger('perms')
 
+# permissions, granted to the members holding at least one of the configured roles
+SUPPORT = 'support'
+SUPPORT_OR_SUPERCOACH = 'support_or_supercoach'
+TEAM_COACH = 'team_coach'
+VOTE = 'vote'
 
-def is_support_user(ctx):
-    # reject if not in a server channel
-    if ctx.guild is None:
-        log.warning('rejecting because not in a server context')
-        return False
 
-    utils_cog = ctx.bot.get_cog('UtilsCog')
-    author = ctx.author
-    role_names = [r.name for r in author.roles]
-    return utils_cog.settings.ADMIN_ROLE in role_names
+class PermissionService:
+    """
+    Answers "does this member have this permission" by intersecting role ids.
 
+    The configured role names are resolved to role ids once (and again when
+    the guild index changes, i.e. a role was created, deleted or renamed).
+    Results are cached per member; UtilsCog forgets a member when their roles
+    change or they leave the guild.
+    """
 
-def is_support_or_supercoach_user(ctx):
+    def __init__(self, settings):
+        self.settings = settings
+        self._role_ids: Dict[str, FrozenSet[int]] = {}
+        self._resolved_generation = None
+        # {member_id: {permission: bool}}
+        self._members: Dict[int, Dict[str, bool]] = {}
+
+    def _role_names(self, permission):
+        if permission == SUPPORT:
+            return [self.settings.ADMIN_ROLE]
+        if permission == SUPPORT_OR_SUPERCOACH:
+            return [self.settings.ADMIN_ROLE, self.settings.SUPER_COACH_ROLE]
+        if permission == TEAM_COACH:
+            return [self.settings.COACH_ROLE, self.settings.SUPER_COACH_ROLE, self.settings.FACILITATEUR_ROLE]
+        if permission == VOTE:
+            return self.settings.VOTING_ROLES
+        raise ValueError(f"unknown permission {permission!r}")
+
+    def role_ids(self, permission) -> FrozenSet[int]:
+        index = self.settings.index
+        if self._resolved_generation != index.role_generation:
+            # roles changed: every cached answer may be wrong
+            self._role_ids.clear()
+            self._members.clear()
+            self._resolved_generation = index.role_generation
+
+        role_ids = self._role_ids.get(permission)
+        if role_ids is None:
+            roles = (index.role(name) for name in self._role_names(permission))
+            role_ids = self._role_ids[permission] = frozenset(role.id for role in roles if role is not None)
+        return role_ids
+
+    def has(self, member, permission) -> bool:
+        # users outside the guild (DMs) have no roles
+        if not isinstance(member, discord.Member):
+            return False
+
+        role_ids = self.role_ids(permission)
+
+        cached = self._members.setdefault(member.id, {})
+        allowed = cached.get(permission)
+        if allowed is None:
+            allowed = cached[permission] = not role_ids.isdisjoint(role.id for role in member.roles)
+        return allowed
+
+    def forget(self, member_id: int):
+        self._members.pop(member_id, None)
+
+
+def _has_permission(ctx, permission):
     # reject if not in a server channel
     if ctx.guild is None:
         log.warning('rejecting because not in a server context')
         return False
 
     utils_cog = ctx.bot.get_cog('UtilsCog')
-    author = ctx.author
-    role_names = [r.name for r in author.roles]
-    return (utils_cog.settings.ADMIN_ROLE in role_names) or (utils_cog.settings.SUPER_COACH_ROLE in role_names)
+    return utils_cog.permissions.has(ctx.author, permission)
+
+
+def is_support_user(ctx):
+    return _has_permission(ctx, SUPPORT)
+
+
+def is_support_or_supercoach_user(ctx):
+    return _has_permission(ctx, SUPPORT_OR_SUPERCOACH)
@@ -1,29 +1,131 @@
+import asyncio
+import multiprocessing
+import time
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 
+import aiohttp
 import discord
-import requests
+import structlog
 from discord.ext import commands
-from pdfminer.high_level import extract_text
 
 from extensions import reactions
 from extensions.base_cog import BaseCog
 
+log = structlog.get_logger('planning')
+
+FIELDS = [
+    'planning',
+    'vendredi 25 novembre 2022',
+    'samedi 26 novembre 2022',
+    'dimanche 27 novembre 2022'
+]
+
+
+def _extract_sections(pdf_bytes):
+    """
+    Extracts the planning text and splits it into (title, text) sections, one per entry of FIELDS found.
+    Runs in a worker process: pdfminer is CPU bound and would block the event loop.
+    """
+    from pdfminer.high_level import extract_text
+
+    pdf = extract_text(BytesIO(pdf_bytes))
+    pdf_lower = pdf.lower()
+
+    idxs = []
+    idx_ends = []
+
+    for f in FIELDS:
+        idx = pdf_lower.find(f)
+        if idx != -1:
+            idxs.append(idx)
+            idx_ends.append(idx + len(f))
+
+    sections = []
+
+    for i in range(len(idxs)):
+        field_name = pdf[idxs[i]:idx_ends[i]]
+        msg_end = -1 if i + 1 >= len(idxs) else idxs[i + 1]
+        sections.append((field_name, pdf[idx_ends[i]:msg_end]))
+
+    return sections
+
 
 class PlanningCog(BaseCog):
     """
     Planning
     """
 
+    # the PDF is revalidated (ETag / Last-Modified) at most this often
+    REFRESH_INTERVAL = 300
+
     def __init__(self, bot):
         super().__init__(bot)
+        self._sections = None
+        self._etag = None
+        self._last_modified = None
+        self._checked_at = 0
+        self._refresh_lock = asyncio.Lock()
+        # spawn, not fork: forking the multithreaded bot process (watchdog thread, aiohttp) can deadlock the child
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+
+    async def cog_unload(self):
+        self._executor.shutdown(wait=False)
+
+    async def _get_sections(self):
+        if self._sections is not None and time.monotonic() - self._checked_at < self.REFRESH_INTERVAL:
+            return self._sections
+
+        async with self._refresh_lock:
+            if self._sections is None or time.monotonic() - self._checked_at >= self.REFRESH_INTERVAL:
+                await self._refresh()
+
+        return self._sections
+
+    async def _refresh(self):
+        headers = {}
+
+        if self._sections is not None:
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(self.settings.EVENT_PLANNING_URL, headers=headers, allow_redirects=True,
+                                       timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    if response.status == 304:
+                        log.debug('planning not modified')
+                        self._checked_at = time.monotonic()
+                        return
+
+                    response.raise_for_status()
+                    content = await response.read()
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if self._sections is None:
+                raise
+            # serve the previous version rather than failing the command
+            log.warning('planning refresh failed, serving cached version', error=repr(e))
+            self._checked_at = time.monotonic()
+            return
+
+        loop = asyncio.get_running_loop()
+        self._sections = await loop.run_in_executor(self._executor, _extract_sections, content)
+        self._etag = etag
+        self._last_modified = last_modified
+        self._checked_at = time.monotonic()
+        log.info('planning extracted', sections=len(self._sections))
 
     @commands.command(name='planning', aliases=['agenda'])
     async def planning(self, ctx, period: typing.Optional[str] = None):
         """
         Commande: !planning ou !agenda
         Argument: [opt: vendredi|samedi|dimanche|semaine]
-        
+
         Donne le planning et le lien vers le PDF.
         """
         member = ctx.author
@@ -36,42 +138,15 @@ class PlanningCog(BaseCog):
         embed.add_field(name="Lien", value=self.settings.EVENT_PLANNING_URL)
         embed.set_thumbnail(url=self.settings.EVENT_ICON_URL)
 
-        req = requests.get(self.settings.EVENT_PLANNING_URL, allow_redirects=True)
-        bio = BytesIO(req.content)
-        pdf = extract_text(bio)
+        sections = await self._get_sections()
 
-        fields = [
-            'planning',
-            'vendredi 25 novembre 2022',
-            'samedi 26 novembre 2022',
-            'dimanche 27 novembre 2022'
-        ]
-
-        idxs = []
-        idx_ends = []
         opt_list = {'vendredi': 1, 'samedi': 2, 'dimanche': 3}
 
-        for f in fields:
-            try:
-                idx = pdf.lower().index(f)
-                idx_end = idx + len(f)
-                idxs.append(idx)
-                idx_ends.append(idx_end)
-            except ValueError:
-                pass
-
         if period is None:
-            for i in range(len(idxs)):
-                field_name = pdf[idxs[i]:idx_ends[i]]
-                msg_end = -1 if i + 1 >= len(idxs) else idxs[i + 1]
-                msg = pdf[idx_ends[i]:msg_end]
+            for field_name, msg in sections:
                 embed.add_field(name=field_name, value=msg)
         elif period.lower() in opt_list:
-            opt = period.lower()
-            period = opt_list[opt]
-            field_name = pdf[idxs[period]:idx_ends[period]]
-            msg_end = -1 if period + 1 >= len(idxs) else idxs[period + 1]
-            msg = pdf[idx_ends[period]:msg_end]
+            field_name, msg = sections[opt_list[period.lower()]]
             embed.add_field(name=field_name, value=msg)
         else:
             field_name = 'error'
@@ -87,5 +162,5 @@ class PlanningCog(BaseCog):
         await ctx.message.add_reaction(reactions.SUCCESS)
 
 
-def setup(bot):
-    bot.add_cog(PlanningCog(bot))
+async def setup(bot):
+    await bot.add_cog(PlanningCog(bot))
@@ -1,4 +1,5 @@
-from functools import cached_property
+from collections import OrderedDict
+from typing import Optional
 
 import discord
 import structlog
@@ -10,6 +11,17 @@ from .base_cog import BaseCog
 log = structlog.get_logger()
 
 
+class _Poll:
+    """Metadata and vote ledger of an open poll."""
+
+    def __init__(self, title, maxvotes, options):
+        self.title = title
+        self.maxvotes = maxvotes
+        self.options = options
+        # {user id: set of emojis}
+        self.votes = {}
+
+
 class PollCog(BaseCog):
     """
     Sondages - Poll Management System
@@ -37,17 +49,99 @@ class PollCog(BaseCog):
     REACTIONS_YESNO = ['✅', '❌']
     REACTIONS_MULTI = ['🇦', '🇧', '🇨', '🇩', '🇪', '🇫', '🇬', '🇭', '🇮', '🇯', '🇰', '🇱', '🇲', '🇳', '🇴', '🇵', '🇶', '🇷', '🇸',
                        '🇹', '🇺', '🇻', '🇼', '🇽', '🇾', '🇿']
+    POLL_CACHE_SIZE = 64
+    NOT_POLL_CACHE_SIZE = 1024
 
     def __init__(self, bot):
         super().__init__(bot)
+        # LRU of the polls we know about: {poll message id: _Poll}
+        self._polls = OrderedDict()
+        # LRU of the message ids known not to be (open) polls, kept apart so they never evict a poll
+        self._not_polls = OrderedDict()
 
-    @cached_property
+    @property
     def voting_channel(self):
         return self.settings.get_channel('VOTE')
 
     async def cog_load(self):
         await super().cog_load()
 
+        if self.voting_channel:
+            await self._seed_polls()
+
+    def _remember(self, message_id, poll):
+        if poll is None:
+            self._polls.pop(message_id, None)
+            cache, size = self._not_polls, self.NOT_POLL_CACHE_SIZE
+        else:
+            self._not_polls.pop(message_id, None)
+            cache, size = self._polls, self.POLL_CACHE_SIZE
+
+        cache[message_id] = poll
+        cache.move_to_end(message_id)
+
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+    def _forget(self, message_id):
+        self._polls.pop(message_id, None)
+        self._not_polls.pop(message_id, None)
+
+    async def _load_poll(self, message) -> Optional[_Poll]:
+        """Reads the poll metadata and builds its vote ledger from the current reactions (once per poll)."""
+        poll = None
+
+        if message.author == self.bot.user:
+            for e in message.embeds:
+                # check if it's a vote
+                if e.footer.text and 'Poll' in e.footer.text:
+                    try:
+                        maxvotes = int(e.footer.text.split()[0])
+                    except ValueError:
+                        break
+
+                    poll = _Poll(e.title, maxvotes, [str(r.emoji) for r in message.reactions if r.me])
+
+                    for r in message.reactions:
+                        async for user in r.users():
+                            if not user.bot:
+                                poll.votes.setdefault(user.id, set()).add(str(r.emoji))
+                    break
+
+        self._remember(message.id, poll)
+        return poll
+
+    async def _get_poll(self, message_id) -> Optional[_Poll]:
+        if message_id in self._polls:
+            self._polls.move_to_end(message_id)
+            return self._polls[message_id]
+
+        if message_id in self._not_polls:
+            self._not_polls.move_to_end(message_id)
+            return None
+
+        # cache miss: a single fetch, then the poll is served from memory
+        try:
+            message = await self.voting_channel.fetch_message(message_id)
+        except discord.HTTPException as e:
+            # deleted meanwhile (NotFound) or not readable (Forbidden): nothing to count
+            log.info('poll message not available', message_id=message_id, status=e.status)
+            self._remember(message_id, None)
+            return None
+
+        return await self._load_poll(message)
+
+    async def _seed_polls(self):
+        """Loads the polls among the most recent messages, oldest first so the newest end up most recently used."""
+        messages = [message async for message in self.voting_channel.history(limit=self.POLL_CACHE_SIZE)]
+        seeded = 0
+
+        for message in reversed(messages):
+            if await self._load_poll(message) is not None:
+                seeded += 1
+
+        log.info('poll cache seeded', polls=seeded, scanned=len(messages))
+
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
         message = ctx.message
@@ -82,9 +176,8 @@ class PollCog(BaseCog):
 
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
 
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send("seuls les admins peuvent faire cette action!")
             return
@@ -121,6 +214,7 @@ class PollCog(BaseCog):
         embed.set_footer(text=f'{maxvotes} Poll : ' + str(react_message.id))
 
         await react_message.edit(embed=embed)
+        self._remember(react_message.id, _Poll(question, maxvotes, reactions[:len(options)]))
         await ctx.send(f"Le sondage est prêt! Il se trouve sur <#{self.voting_channel.id}>")
 
     @commands.command(name='reset_poll')
@@ -132,27 +226,27 @@ class PollCog(BaseCog):
 
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
 
-        if self.settings.PARTICIPANT_ROLE not in role_names:
+        participant_role = self.settings.get_role('PARTICIPANT')
+        if participant_role is None or author.get_role(participant_role.id) is None:
             return
 
-        print(role_names)
-
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send("seuls les admins peuvent faire cette action!")
             return
 
-        print(id)
+        log.debug('resetting poll', message_id=id)
         called_msg = await ctx.fetch_message(id)
 
-        print("ici")
-
         if called_msg.author != self.bot.user:
             # chek whether bot actually posted the reacted message, otherwise ignores
             return
 
+        # the ledger is reset first: votes cast while the reactions are re-added are kept on both sides
+        if self._polls.get(called_msg.id) is not None:
+            self._polls[called_msg.id].votes = {}
+
         msg_react = called_msg.reactions
 
         for r in msg_react:
@@ -168,17 +262,15 @@ class PollCog(BaseCog):
 
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
 
-        print(role_names)
-
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send("seuls les admins peuvent faire cette action!")
             return
 
         message = await ctx.fetch_message(id)
         await message.delete()
+        self._forget(id)
 
     @commands.command(name='close_poll')
     @commands.check(perms.is_support_user)
@@ -190,9 +282,8 @@ class PollCog(BaseCog):
 
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
 
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send("seuls les admins peuvent faire cette action!")
             return
@@ -219,6 +310,9 @@ class PollCog(BaseCog):
             votes[r.emoji] = max(r.count - 1, 0)
             await r.clear()
 
+        # the poll is closed: remember it as "not a poll" so late reactions don't trigger a fetch
+        self._remember(called_msg.id, None)
+
         log.info('vote result', result=votes)
 
         votes = {k: v for k, v in sorted(votes.items(), key=lambda item: item[1], reverse=True)}
@@ -232,83 +326,98 @@ class PollCog(BaseCog):
         await called_msg.edit(embed=embed)
 
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        message = reaction.message
-        channel = message.channel
-        emoji = reaction.emoji
-
-        if channel.id != self.voting_channel.id:
+    async def on_raw_reaction_add(self, payload):
+        # raw event: fires even when the poll message is not in the message cache
+        if self.voting_channel is None or payload.channel_id != self.voting_channel.id:
             # reacts only on vote channel are processed
             log.debug('ignoring reaction not related to vote')
             return
 
-        if user.bot:
+        user = payload.member
+        emoji = str(payload.emoji)
+
+        if user is None or user.bot:
             log.debug('ignoring bot reaction add')
             return
 
-        dm_channel = user.dm_channel
-        if dm_channel is None:
-            dm_channel = await user.create_dm()
-
-        number_of_votes = 0
+        message = self.voting_channel.get_partial_message(payload.message_id)
 
-        role_names = [r.name for r in user.roles]
         # Check if user has any of the voting roles defined in settings
         # VOTING_ROLES is a list that defaults to [PARTICIPANT_ROLE] if BOT_VOTING_ROLES env var is not set
-        has_voting_permission = any(role_name in self.settings.VOTING_ROLES for role_name in role_names)
-        
+        has_voting_permission = self.permissions.has(user, perms.VOTE)
+
         if not has_voting_permission:
-            await reaction.remove(user)
+            await message.remove_reaction(payload.emoji, user)
+            dm_channel = user.dm_channel or await user.create_dm()
             await dm_channel.send(f'<@!{user.id}> n\'a pas le droit de vote')
             return
 
-        if message.author != self.bot.user:
-            # chek whether bot actually posted the reacted message, otherwise ignores
-            log.debug("Ignored - It's not our vote", author=message.author.name)
-            return
+        poll = await self._get_poll(payload.message_id)
 
-        if user == self.bot.user:
-            # ignores if it is the bot voting
-            log.debug("Ignored - It's our reaction")
+        if poll is None:
+            # not one of our polls, ignore
+            log.debug("Ignored - It's not our vote", message_id=payload.message_id)
             return
 
-        if (emoji not in self.REACTIONS_YESNO) and (emoji not in self.REACTIONS_MULTI):
+        allowed = poll.options or (self.REACTIONS_YESNO + self.REACTIONS_MULTI)
+
+        if emoji not in allowed:
             # only vote reactions are accepted
             log.info('Removing unauthorized reaction', emoji=emoji, user=user.name)
-            await reaction.remove(user)
+            await message.remove_reaction(payload.emoji, user)
             return
 
-        for e in message.embeds:
-            # check if it's a reaction to a vote
-            if ('Poll' in e.footer.text):
-                title = e.title
-                try:
-                    maxvotes = int(e.footer.text.split()[0])
-                except:
-                    return
-                break
-        else:
-            log.debug('Ignoring - No embeds')
+        log.info('Counted maxvotes', maxvotes=poll.maxvotes)
+
+        user_votes = poll.votes.setdefault(user.id, set())
+        user_votes.add(emoji)
+        number_of_votes = len(user_votes)
+
+        dm_channel = user.dm_channel or await user.create_dm()
+
+        if number_of_votes > poll.maxvotes:
+            user_votes.discard(emoji)
+            await message.remove_reaction(payload.emoji, user)
+            await dm_channel.send(
+                f'<@!{user.id}> ne peut plus voter à "{poll.title}", c\'est son vote n°{number_of_votes}/{poll.maxvotes}')
+            log.info('User has exceeded vote quota', user=user.name, number_of_votes=number_of_votes,
+                     maxvotes=poll.maxvotes)
+            return
+
+        await dm_channel.send(
+            f'{user.name} a voté {emoji} à "{poll.title}", c\'est son vote n°{number_of_votes}/{poll.maxvotes}')
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        # only polls still in the cache are tracked, an evicted poll is rebuilt from its reactions on next vote
+        poll = self._polls.get(payload.message_id)
+
+        if poll is None:
             return
 
-        log.info('Counted maxvotes', maxvotes=maxvotes)
+        user_votes = poll.votes.get(payload.user_id)
 
-        for r in message.reactions:
-            users = [user async for user in r.users()]
+        if user_votes is not None:
+            user_votes.discard(str(payload.emoji))
 
-            if user in users:
-                number_of_votes += 1
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload):
+        # a moderator removed every reaction: nobody has voted anymore
+        poll = self._polls.get(payload.message_id)
 
-                if number_of_votes > maxvotes:
-                    await reaction.remove(user)
-                    await dm_channel.send(
-                        f'<@!{user.id}> ne peut plus voter à "{title}", c\'est son vote n°{number_of_votes}/{maxvotes}')
-                    log.info('User has exceeded vote quota', user=user.name, number_of_votes=number_of_votes,
-                             maxvotes=maxvotes)
-                    return
+        if poll is not None:
+            poll.votes = {}
 
-        await dm_channel.send(
-            f'{user.name} a voté {reaction.emoji} à "{title}", c\'est son vote n°{number_of_votes}/{maxvotes}')
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload):
+        poll = self._polls.get(payload.message_id)
+
+        if poll is None:
+            return
+
+        emoji = str(payload.emoji)
+        for user_votes in poll.votes.values():
+            user_votes.discard(emoji)
 
 
 async def setup(bot):
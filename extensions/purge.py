@@ -0,0 +1,127 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+
+import discord
+import structlog
+
+log = structlog.get_logger('purge')
+
+# Discord only bulk-deletes messages younger than 14 days; keep a margin for the time the job runs
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=10)
+BULK_DELETE_SIZE = 100
+# older messages are deleted one by one
+SINGLE_DELETE_DELAY = 0.1
+
+
+class PurgeJob:
+    """
+    Deletes the messages of a channel posted between `after` and `before`
+    (optionally only those of some authors), newest first.
+
+    Messages younger than 14 days are removed with bulk deletes of up to 100
+    messages; the older ones, which Discord refuses to bulk-delete, are
+    deleted one by one. The job runs in a background task and edits a
+    progress message; `cancel()` stops it between two deletes.
+    """
+
+    def __init__(self, channel: discord.TextChannel, before: Optional[datetime] = None, after: Optional[datetime] = None,
+                 author_ids: Optional[Set[int]] = None, keep_ids: Set[int] = frozenset(),
+                 progress_interval=5.0):
+        self.channel = channel
+        self.before = before
+        self.after = after
+        self.author_ids = author_ids
+        self.keep_ids = keep_ids
+        self.progress_interval = progress_interval
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def deleted(self):
+        return self.bulk_deleted + self.single_deleted
+
+    def _selected(self, message):
+        if message.id in self.keep_ids:
+            return False
+        return self.author_ids is None or message.author.id in self.author_ids
+
+    def start(self, progress_message: Optional[discord.Message] = None):
+        self.task = asyncio.create_task(self._run(progress_message))
+        return self.task
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _run(self, progress_message):
+        started_at = time.monotonic()
+        last_report = started_at
+        status = "terminée"
+        batch = []
+
+        try:
+            bulk_limit = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+            async for message in self.channel.history(limit=None, before=self.before, after=self.after,
+                                                      oldest_first=False):
+                if not self._selected(message):
+                    continue
+
+                if message.created_at > bulk_limit:
+                    batch.append(message)
+                    if len(batch) == BULK_DELETE_SIZE:
+                        await self._bulk_delete(batch)
+                        batch = []
+                else:
+                    # history is newest first: from here on every message is too old for a bulk delete
+                    if batch:
+                        await self._bulk_delete(batch)
+                        batch = []
+                    await self._single_delete(message)
+
+                if progress_message is not None and time.monotonic() - last_report >= self.progress_interval:
+                    last_report = time.monotonic()
+                    await self._report(progress_message, "en cours")
+
+            if batch:
+                await self._bulk_delete(batch)
+        except asyncio.CancelledError:
+            status = "annulée"
+        except discord.HTTPException as e:
+            status = "interrompue (erreur Discord)"
+            log.error('purge failed', channel=self.channel.name, exc_info=e)
+
+        log.info('purge done', channel=self.channel.name, status=status, bulk=self.bulk_deleted,
+                 single=self.single_deleted, duration=round(time.monotonic() - started_at, 1))
+
+        if progress_message is not None:
+            await self._report(progress_message, status)
+
+    async def _bulk_delete(self, messages):
+        await self.channel.delete_messages(messages)
+        self.bulk_deleted += len(messages)
+
+    async def _single_delete(self, message):
+        try:
+            await message.delete()
+        except discord.NotFound:
+            return
+        self.single_deleted += 1
+        await asyncio.sleep(SINGLE_DELETE_DELAY)  # rate limiting
+
+    async def _report(self, progress_message, status):
+        try:
+            await progress_message.edit(
+                content=f"Purge {status} : {self.deleted} messages supprimés "
+                        f"({self.bulk_deleted} en masse, {self.single_deleted} un par un)")
+        except discord.HTTPException as e:
+            log.warning('could not update purge progress', exc_info=e)
+
+
+def parse_day(value: str, end_of_day=False) -> datetime:
+    """`JJ/MM/AAAA` to an aware UTC datetime, at the start of the day or at the start of the next one."""
+    day = datetime.strptime(value, '%d/%m/%Y').replace(tzinfo=timezone.utc)
+    return day + timedelta(days=1) if end_of_day else day
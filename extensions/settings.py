@@ -5,6 +5,8 @@ import structlog
 from discord import utils
 from discord.ext import commands
 
+from .guild_index import GuildIndex
+
 log = structlog.get_logger()
 
 DEFAULT_HELP_LINKS = "HIC|https://www.hackingindustry.camp," \
@@ -39,8 +41,24 @@ class Settings:
         else:
             self.VOTING_ROLES = [self.PARTICIPANT_ROLE]
         self.TEAM_CATEGORY = os.getenv('BOT_TEAM_CATEGORY', 'Participants')
+        self.TEAM_PROVISIONING_CONCURRENCY = int(os.getenv('BOT_TEAM_PROVISIONING_CONCURRENCY', '4'))
         self.JURY_ROLE = os.getenv('BOT_JURY_ROLE', 'Jury')
         self.URL_API = os.getenv('BOT_URL_API', 'https://hic-manager-dev.osc-fr1.scalingo.io')
+        self.AUTO_CHECKIN_ENABLED = os.getenv('AUTO_CHECKIN_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+        # path of a bulk check-in endpoint on the API, empty when the backend has none
+        self.CHECKIN_BULK_ENDPOINT = os.getenv('BOT_CHECKIN_BULK_ENDPOINT', '')
+        # event window for the auto check-in (ISO dates), or an API endpoint returning start_date/end_date
+        self.EVENT_START_DATE = os.getenv('EVENT_START_DATE', '')
+        self.EVENT_END_DATE = os.getenv('EVENT_END_DATE', '')
+        self.EVENT_ENDPOINT = os.getenv('BOT_EVENT_ENDPOINT', '')
+        self.CHECKIN_STORE_MAX_ENTRIES = int(os.getenv('BOT_CHECKIN_STORE_MAX_ENTRIES', '5000'))
+        self.API_TIMEOUT = float(os.getenv('BOT_API_TIMEOUT', '10'))
+        self.API_MAX_CONCURRENCY = int(os.getenv('BOT_API_MAX_CONCURRENCY', '8'))
+        self.ATTENDEES_TTL = float(os.getenv('BOT_ATTENDEES_TTL', '60'))
+        self.STATE_DIR = os.getenv('BOT_STATE_DIR', 'state')
+        self.DM_WORKERS = int(os.getenv('BOT_DM_WORKERS', '4'))
+        self.METRICS_PORT = int(os.getenv('BOT_METRICS_PORT', '8765'))
+        self.STALL_THRESHOLD = float(os.getenv('BOT_STALL_THRESHOLD', '1.0'))
         self.SERVER_NAME = os.getenv('SERVER_NAME', 'Hacking Industry Camp')
         self.SERVER_ID = int(os.getenv('SERVER_ID', '804784231732740106'))
         self.EVENT_NAME = os.getenv('EVENT_NAME', 'Hacking Industry Camp')
@@ -52,11 +70,14 @@ class Settings:
 
         self.bot = bot
         self.guild = None
+        # name -> role/channel lookups, kept up to date by UtilsCog from the guild events
+        self.index = GuildIndex()
 
     async def cog_load(self):
         for guild in self.bot.guilds:
             if guild.id == self.SERVER_ID:
                 self.guild = guild
+                self.index.attach(guild)
                 break
         else:
             log.error('could not find our server', server_name=self.SERVER_NAME, server_id=self.SERVER_ID)
@@ -75,14 +96,10 @@ class Settings:
         setting = f"{role_code.upper()}_ROLE"
         setting_value = getattr(self, setting)
 
-        role = discord.utils.get(self.guild.roles, name=setting_value)
-
-        return role
+        return self.index.role(setting_value)
 
     def get_channel(self, channel_code):
         setting = f"CHANNEL_{channel_code.upper()}"
         setting_value = getattr(self, setting)
 
-        channel = discord.utils.get(self.guild.text_channels, name=setting_value)
-
-        return channel
+        return self.index.text_channel(setting_value)
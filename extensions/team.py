@@ -1,7 +1,7 @@
-from functools import cached_property
+import asyncio
+from collections import Counter
 
 import discord
-import requests
 import structlog
 from discord.ext import commands
 
@@ -19,15 +19,13 @@ class TeamCog(BaseCog):
     def __init__(self, bot):
         super().__init__(bot)
 
-    @cached_property
+    @property
     def role_chef(self) -> discord.Role:
         return self.settings.get_role('PROJECT_LEAD')
 
-    @cached_property
+    @property
     def category_participants(self):
-        return discord.utils.find(
-            lambda c: c.name == self.settings.TEAM_CATEGORY,
-            self.guild.categories)
+        return self.settings.index.category(self.settings.TEAM_CATEGORY)
 
     async def cog_load(self):
         await super().cog_load()
@@ -61,9 +59,8 @@ class TeamCog(BaseCog):
         """
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
 
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(f"seuls les admins ({self.settings.ADMIN_ROLE}) peuvent faire cette action!")
             return
@@ -73,8 +70,7 @@ class TeamCog(BaseCog):
             await ctx.send(f"Le nom d'équipe doit commencer par '{self.settings.TEAM_PREFIX}' !")
             return
 
-        for member in members:
-            await member.add_roles(nom_de_lequipe)
+        await asyncio.gather(*(self.mutations.edit(member, add_roles=[nom_de_lequipe]) for member in members))
 
         await ctx.message.add_reaction(reactions.SUCCESS)
 
@@ -86,9 +82,8 @@ class TeamCog(BaseCog):
         """
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
 
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(f"seuls les admins ({self.settings.ADMIN_ROLE}) peuvent faire cette action!")
             return
@@ -98,9 +93,9 @@ class TeamCog(BaseCog):
             await ctx.send(f"Le nom d'équipe doit commencer par '{self.settings.TEAM_PREFIX}' !")
             return
 
-        for member in members:
-            await member.remove_roles(nom_de_lequipe)
-            await ctx.message.add_reaction(reactions.SUCCESS)
+        await asyncio.gather(*(self.mutations.edit(member, remove_roles=[nom_de_lequipe]) for member in members))
+
+        await ctx.message.add_reaction(reactions.SUCCESS)
 
     @commands.command(name='teamlist')
     @commands.check(perms.is_support_user)
@@ -111,9 +106,7 @@ class TeamCog(BaseCog):
         author = ctx.author
         server: discord.Guild = ctx.guild
 
-        role_names = [r.name for r in author.roles]
-
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(f"seuls les admins ({self.settings.ADMIN_ROLE}) peuvent faire cette action!")
             return
@@ -130,7 +123,7 @@ class TeamCog(BaseCog):
         role = nom_de_lequipe
 
         if not nom_de_lequipe.startswith("<@"):
-            role = discord.utils.find(lambda r: r.name == nom_de_lequipe, self.guild.roles)
+            role = self.settings.index.role(nom_de_lequipe)
         else:
             role = discord.utils.get(self.guild.roles, id=int(nom_de_lequipe[3:-1]))
             nom_de_lequipe = role.name
@@ -139,9 +132,7 @@ class TeamCog(BaseCog):
         author = ctx.author
         server: discord.Guild = ctx.guild
 
-        role_names = [r.name for r in author.roles]
-
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(f"seuls les admins ({self.settings.ADMIN_ROLE}) peuvent faire cette action!")
             return
@@ -167,8 +158,7 @@ class TeamCog(BaseCog):
 
             log.info('removing roles of members')
 
-            for m in members:
-                await m.remove_roles(role)
+            await asyncio.gather(*(self.mutations.edit(m, remove_roles=[role]) for m in members))
 
             log.info('removing role')
 
@@ -180,13 +170,13 @@ class TeamCog(BaseCog):
 
         channels = []
 
-        voice_channel = discord.utils.find(lambda c: c.name == nom_de_lequipe.lower(), server.voice_channels)
+        voice_channel = self.settings.index.voice_channel(nom_de_lequipe.lower())
 
         if voice_channel:
             log.info('found voice channel', channel=voice_channel)
             channels.append(voice_channel)
 
-        text_channel = discord.utils.find(lambda c: c.name == nom_de_lequipe.lower(), server.text_channels)
+        text_channel = self.settings.index.text_channel(nom_de_lequipe.lower())
 
         if text_channel:
             log.info('found text channel', channel=text_channel)
@@ -216,9 +206,8 @@ class TeamCog(BaseCog):
         message = ctx.message
         author = ctx.author
         server: discord.Guild = ctx.guild
-        role_names = [r.name for r in author.roles]
 
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(f"seuls les admins ({self.settings.ADMIN_ROLE}) peuvent faire cette action!")
             return
@@ -245,8 +234,8 @@ class TeamCog(BaseCog):
         await self._assign_role_for_team_lead(chef_de_projet, nom_de_lequipe, team_role)
 
         # then each member
-        for member in members:
-            await self._assign_role_for_team_member(member, )
+        await asyncio.gather(*(self._assign_role_for_team_member(member, nom_de_lequipe, team_role)
+                               for member in members if member.id != chef_de_projet.id))
 
         await message.add_reaction(reactions.SUCCESS)
 
@@ -285,9 +274,8 @@ class TeamCog(BaseCog):
         message = ctx.message
         author = ctx.author
         server: discord.Guild = ctx.guild
-        role_names = [r.name for r in author.roles]
 
-        if self.settings.ADMIN_ROLE not in role_names:
+        if not self.permissions.has(author, perms.SUPPORT):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(f"Seuls les admins ({self.settings.ADMIN_ROLE}) peuvent faire cette action!")
             return
@@ -295,7 +283,7 @@ class TeamCog(BaseCog):
         # Handle role mention or name
         role = None
         if not nom_de_lequipe.startswith("<@&"):
-            role = discord.utils.find(lambda r: r.name == nom_de_lequipe, server.roles)
+            role = self.settings.index.role(nom_de_lequipe)
         else:
             role = discord.utils.get(server.roles, id=int(nom_de_lequipe[3:-1]))
             if role:
@@ -337,10 +325,7 @@ class TeamCog(BaseCog):
                 return
 
             # Find and fix text channel permissions
-            text_channel = discord.utils.find(
-                lambda c: c.name.lower() == role.name.lower(),
-                team_cat.text_channels
-            )
+            text_channel = self.settings.index.text_channel(role.name, case_insensitive=True, category=team_cat)
 
             if text_channel:
                 log_team.info('fixing text channel permissions')
@@ -349,10 +334,7 @@ class TeamCog(BaseCog):
                 log_team.warning('text channel not found')
 
             # Find and fix voice channel permissions
-            voice_channel = discord.utils.find(
-                lambda c: c.name.lower() == role.name.lower(),
-                team_cat.voice_channels
-            )
+            voice_channel = self.settings.index.voice_channel(role.name, case_insensitive=True, category=team_cat)
 
             if voice_channel:
                 log_team.info('fixing voice channel permissions')
@@ -393,11 +375,8 @@ class TeamCog(BaseCog):
         """
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
-        member_role_names = [r.name for r in member.roles]
 
-        if (self.settings.ADMIN_ROLE not in role_names) and (
-                self.settings.SUPER_COACH_ROLE not in role_names):
+        if not self.permissions.has(author, perms.SUPPORT_OR_SUPERCOACH):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(
                 f"Seuls les admins ({self.settings.ADMIN_ROLE}) et les Super Coach ({self.settings.SUPER_COACH_ROLE}) peuvent faire cette action!")
@@ -408,15 +387,13 @@ class TeamCog(BaseCog):
             await ctx.send(f"Le nom d'équipe doit commencer par '{self.settings.TEAM_PREFIX}' !")
             return
 
-        if (self.settings.COACH_ROLE not in member_role_names) and (
-                self.settings.SUPER_COACH_ROLE not in member_role_names) and (
-                self.settings.FACILITATEUR_ROLE not in member_role_names):
+        if not self.permissions.has(member, perms.TEAM_COACH):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(
                 f"Seuls les coachs, les Super Coach et les facilitateurs peuvent se faire ajouter à des équipe !")
             return
 
-        await member.add_roles(nom_de_lequipe)
+        await self.mutations.edit(member, add_roles=[nom_de_lequipe])
         await ctx.message.add_reaction(reactions.SUCCESS)
 
     @commands.command(name='teamcoachremove')
@@ -427,11 +404,8 @@ class TeamCog(BaseCog):
         """
         message = ctx.message
         author = ctx.author
-        role_names = [r.name for r in author.roles]
-        member_role_names = [r.name for r in member.roles]
 
-        if (self.settings.ADMIN_ROLE not in role_names) and (
-                self.settings.SUPER_COACH_ROLE not in role_names):
+        if not self.permissions.has(author, perms.SUPPORT_OR_SUPERCOACH):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(
                 f"Seuls les Admins ({self.settings.ADMIN_ROLE}) et les Super Coach ({self.settings.SUPER_COACH_ROLE}) peuvent faire cette action!")
@@ -442,131 +416,192 @@ class TeamCog(BaseCog):
             await ctx.send(f"Le nom d'équipe doit commencer par '{self.settings.TEAM_PREFIX}' !")
             return
 
-        if (self.settings.COACH_ROLE not in member_role_names) and (
-                self.settings.SUPER_COACH_ROLE not in member_role_names) and (
-                self.settings.FACILITATEUR_ROLE not in member_role_names):
+        if not self.permissions.has(member, perms.TEAM_COACH):
             await message.add_reaction(reactions.FAILURE)
             await ctx.send(
                 f"Seuls les coachs, les Super Coach et les facilitateurs peuvent se faire retirer à des équipe !")
             return
 
-        await member.remove_roles(nom_de_lequipe)
+        await self.mutations.edit(member, remove_roles=[nom_de_lequipe])
         await ctx.message.add_reaction(reactions.SUCCESS)
 
     @commands.command(name='teamapi')
     @commands.check(perms.is_support_user)
     async def teamapi(self, ctx):
-        project_teams = requests.get(f"{self.settings.URL_API}/api/project-teams/").json()
+        project_teams = await self.backend.get_json('/api/project-teams/', timeout=30)
+        project_teams = [t for t in project_teams if t['event'] == self.settings.EVENT_CODE]
 
-        for project_team in project_teams:
-            if project_team['event'] != self.settings.EVENT_CODE:
-                continue
+        if self.category_participants is None:
+            await ctx.message.add_reaction(reactions.FAILURE)
+            await ctx.send(f"❌ Erreur! Catégorie '{self.settings.TEAM_CATEGORY}' introuvable")
+            return
+
+        # the teams are independent: they are provisioned concurrently, but no more than
+        # TEAM_PROVISIONING_CONCURRENCY at once so the role/channel creations stay within Discord's rate limits
+        budget = asyncio.Semaphore(self.settings.TEAM_PROVISIONING_CONCURRENCY)
+        summary = Counter()
 
+        async def provision(project_team):
+            async with budget:
+                await self._provision_team(ctx, project_team, summary)
 
+        async with progress_message(ctx, f"création de {len(project_teams)} équipes"):
+            await asyncio.gather(*(provision(project_team) for project_team in project_teams))
 
-            name_team = f"{self.settings.TEAM_PREFIX}{project_team['number']}"
+        await ctx.send(
+            f"Équipes : {summary['teams']} traitées, {summary['failed']} en échec\n"
+            f"Créés : {summary['roles']} rôles, {summary['text_channels']} canaux texte, "
+            f"{summary['voice_channels']} canaux vocaux\n"
+            f"Membres : {summary['assigned']} ajoutés, {summary['already_assigned']} déjà dans l'équipe, "
+            f"{summary['assignment_failed']} refusés par Discord, {summary['not_found']} introuvables sur le serveur")
 
-            async with progress_message(ctx, name_team):
-                log_team = log.bind(team=name_team, name=project_team['name'])
+    async def _provision_team(self, ctx, project_team, summary):
+        name_team = f"{self.settings.TEAM_PREFIX}{project_team.get('number')}"
+        log_team = log.bind(team=name_team, name=project_team.get('name'))
 
+        try:
+            role_team = self.settings.index.role(name_team)
+            if role_team is None:
                 role_team = await self._create_role_for_team(ctx, log_team, name_team)
+                summary['roles'] += 1
+
+            await self._create_channels_for_team(log_team, name_team, role_team, summary)
 
-                await self._create_channels_for_team(log_team, name_team, role_team)
+            assignments = []
+            # the leader may also be listed among the members: each person is assigned (and counted) once
+            seen = set()
 
-                if project_team['leader']:
-                    leader_team: discord.Member = discord.utils.find(
-                        lambda r: r.id == project_team['leader']['discord_unique_id'],
-                        self.guild.members)
+            if project_team['leader']:
+                leader_id = project_team['leader']['discord_unique_id']
+                leader_team = self.guild.get_member(leader_id)
+                seen.add(leader_id)
 
-                    if leader_team is not None:
-                        await self._assign_role_for_team_lead(leader_team, name_team, role_team)
+                if leader_team is not None:
+                    assignments.append(self._assign_role_for_team_lead(leader_team, name_team, role_team))
                 else:
-                    log_team.warning('no leader for team')
+                    summary['not_found'] += 1
+            else:
+                log_team.warning('no leader for team')
+
+            for member_team_data in project_team['members']:
+                if member_team_data['discord_unique_id'] in seen:
+                    continue
+                seen.add(member_team_data['discord_unique_id'])
+
+                member_team = self.guild.get_member(member_team_data['discord_unique_id'])
 
-                for member_team_data in project_team['members']:
-                    member_team: discord.Member = discord.utils.find(
-                        lambda r: r.id == member_team_data['discord_unique_id'],
-                        self.guild.members)
+                if member_team is not None:
+                    assignments.append(self._assign_role_for_team_member(member_team, name_team, role_team))
+                else:
+                    summary['not_found'] += 1
+                    log_team.warning('member not found', team=project_team['name'],
+                                     discord_id=member_team_data['discord_unique_id'])
+
+            for outcome in await asyncio.gather(*assignments):
+                summary[outcome] += 1
+        except Exception as e:
+            # Discord refusals as well as unexpected payloads: one team must not abort the others and the summary
+            summary['failed'] += 1
+            log_team.error('team provisioning failed', exc_info=e)
+            return
 
-                    if member_team is not None:
-                        await self._assign_role_for_team_member(member_team, name_team, role_team)
-                    else:
-                        log_team.warning('member not found', team=project_team['name'],
-                                         discord_id=member_team_data['discord_unique_id'])
+        summary['teams'] += 1
+        log_team.info('team created', team=project_team['name'])
 
-            log_team.info('team created', team=project_team['name'])
+    async def _assign_roles(self, member, roles):
+        """Returns the outcome counted in the !teamapi summary: 'assigned', 'already_assigned' or 'assignment_failed'."""
+        if all(member.get_role(role.id) is not None for role in roles):
+            return 'already_assigned'
+        return 'assigned' if await self.mutations.edit(member, add_roles=roles) else 'assignment_failed'
 
     async def _assign_role_for_team_member(self, member_team, name_team, role_team):
-        member_team_roles = [r.name for r in member_team.roles]
-        if name_team not in member_team_roles:
-            await member_team.add_roles(role_team)
+        return await self._assign_roles(member_team, [role_team])
 
     async def _assign_role_for_team_lead(self, leader_team, name_team, role_team):
-        leader_team_roles = [r.name for r in leader_team.roles]
-        if name_team not in leader_team_roles:
-            await leader_team.add_roles(role_team)
-            await leader_team.add_roles(self.role_chef)
+        roles = [role_team]
+        if self.role_chef is not None:
+            roles.append(self.role_chef)
+        else:
+            log.warning('team lead role not found', role=self.settings.PROJECT_LEAD_ROLE, team=name_team)
+        return await self._assign_roles(leader_team, roles)
 
-    async def _set_text_channel_permissions(self, text_channel, role_team):
-        """Set correct permissions on a text channel for a team."""
-        # Hide from @everyone
-        everyone_perms = text_channel.overwrites_for(self.guild.default_role)
+    def _text_channel_overwrites(self, base_overwrites, role_team):
+        """Overwrites of a team text channel: hidden from @everyone, open to the team."""
+        overwrites = dict(base_overwrites)
+
+        everyone_perms = discord.PermissionOverwrite(**dict(overwrites.get(self.guild.default_role,
+                                                                           discord.PermissionOverwrite())))
         everyone_perms.read_messages = False
         everyone_perms.view_channel = False
-        await text_channel.set_permissions(self.guild.default_role, overwrite=everyone_perms)
+        overwrites[self.guild.default_role] = everyone_perms
 
-        # Allow team members
-        team_perms = text_channel.overwrites_for(role_team)
+        team_perms = discord.PermissionOverwrite(**dict(overwrites.get(role_team, discord.PermissionOverwrite())))
         team_perms.send_messages = True
         team_perms.read_messages = True
         team_perms.attach_files = True
         team_perms.embed_links = True
         team_perms.read_message_history = True
         team_perms.view_channel = True
+        overwrites[role_team] = team_perms
 
-        await text_channel.set_permissions(role_team, overwrite=team_perms)
+        return overwrites
 
-    async def _set_voice_channel_permissions(self, voice_channel, role_team):
-        """Set correct permissions on a voice channel for a team."""
-        # Hide from @everyone
-        everyone_perms = voice_channel.overwrites_for(self.guild.default_role)
+    def _voice_channel_overwrites(self, base_overwrites, role_team):
+        """Overwrites of a team voice channel: hidden from @everyone, open to the team."""
+        overwrites = dict(base_overwrites)
+
+        everyone_perms = discord.PermissionOverwrite(**dict(overwrites.get(self.guild.default_role,
+                                                                           discord.PermissionOverwrite())))
         everyone_perms.view_channel = False
         everyone_perms.connect = False
-        await voice_channel.set_permissions(self.guild.default_role, overwrite=everyone_perms)
+        overwrites[self.guild.default_role] = everyone_perms
 
-        # Allow team members
-        team_perms = voice_channel.overwrites_for(role_team)
+        team_perms = discord.PermissionOverwrite(**dict(overwrites.get(role_team, discord.PermissionOverwrite())))
         team_perms.connect = True
         team_perms.speak = True
         team_perms.view_channel = True
         team_perms.stream = True
         team_perms.use_voice_activation = True
+        overwrites[role_team] = team_perms
+
+        return overwrites
+
+    async def _set_text_channel_permissions(self, text_channel, role_team):
+        """Set correct permissions on a text channel for a team."""
+        await text_channel.edit(overwrites=self._text_channel_overwrites(text_channel.overwrites, role_team))
+
+    async def _set_voice_channel_permissions(self, voice_channel, role_team):
+        """Set correct permissions on a voice channel for a team."""
+        await voice_channel.edit(overwrites=self._voice_channel_overwrites(voice_channel.overwrites, role_team))
 
-        await voice_channel.set_permissions(role_team, overwrite=team_perms)
+    async def _create_channels_for_team(self, log_team, name_team, role_team, summary=None):
+        """Creates the missing team channels, each with its permission overwrites in the same call."""
+        summary = Counter() if summary is None else summary
+        category = self.category_participants
 
-    async def _create_channels_for_team(self, log_team, name_team, role_team):
-        text_channel_team = discord.utils.find(lambda r: r.name.lower() == name_team.lower(),
-                                               self.category_participants.text_channels)
+        text_channel_team = self.settings.index.text_channel(name_team, case_insensitive=True, category=category)
         if text_channel_team is None:
             log_team.info('create text channel')
-            text_channel_team = await self.category_participants.create_text_channel(name_team)
-            await self._set_text_channel_permissions(text_channel_team, role_team)
+            # starting from the category overwrites, as a channel synced with its category would
+            text_channel_team = await category.create_text_channel(
+                name_team, overwrites=self._text_channel_overwrites(category.overwrites, role_team))
+            summary['text_channels'] += 1
         else:
             log_team.info('text channel exists')
             
-        voice_channel_team = discord.utils.find(lambda r: r.name.lower() == name_team.lower(),
-                                                self.category_participants.voice_channels)
+        voice_channel_team = self.settings.index.voice_channel(name_team, case_insensitive=True, category=category)
         if voice_channel_team is None:
             log_team.info('create voice channel')
-            voice_channel_team = await self.category_participants.create_voice_channel(name_team.lower())
-            await self._set_voice_channel_permissions(voice_channel_team, role_team)
+            voice_channel_team = await category.create_voice_channel(
+                name_team.lower(), overwrites=self._voice_channel_overwrites(category.overwrites, role_team))
+            summary['voice_channels'] += 1
         else:
             log_team.info('voice channel exists')
 
         return text_channel_team, voice_channel_team
 
     async def _create_role_for_team(self, ctx, log_team, name_team):
-        role_team = discord.utils.find(lambda r: r.name == name_team, self.guild.roles)
+        role_team = self.settings.index.role(name_team)
         if role_team is None:
             log_team.info('create role')
             role_team = await ctx.guild.create_role(name=name_team, mentionable=True)
@@ -1,14 +1,13 @@
-import asyncio
 import os
 import traceback
-from datetime import datetime
 
 import discord
 import structlog
 from discord.enums import ChannelType
 from discord.ext import commands
 
-from . import settings, perms
+from . import attendees, backend, metrics, mutations, settings, perms
+from .purge import PurgeJob, parse_day
 
 log = structlog.get_logger()
 
@@ -17,6 +16,12 @@ class UtilsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.settings = settings.Settings(self.bot)
+        self.backend = backend.BackendClient(self.settings)
+        self.attendees = attendees.AttendeeRepository(self.backend, self.settings.ATTENDEES_TTL)
+        self.mutations = mutations.MemberMutationQueue()
+        self.permissions = perms.PermissionService(self.settings)
+        # {channel_id: PurgeJob}
+        self._purge_jobs = {}
 
     async def bot_log_message(self, *args, **kwargs):
         BOT_LOG_CHANNEL_ID = os.getenv('BOT_LOG_CHANNEL_ID')
@@ -40,12 +45,65 @@ class UtilsCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
-        print(error)
+        command = ctx.command and ctx.command.qualified_name
+        metrics.COMMAND_ERRORS.inc(command=command or 'unknown', error=type(error).__name__)
+        log.error('command failed', command=command, exc_info=error)
+
+    def _refresh_index(self, guild, renamed=True, roles=True):
+        if renamed and guild == self.settings.guild:
+            self.settings.index.invalidate(roles=roles)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        self._refresh_index(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self._refresh_index(role.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self._refresh_index(role.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self._refresh_index(after.guild, before.name != after.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self._refresh_index(channel.guild, roles=False)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self._refresh_index(channel.guild, roles=False)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self._refresh_index(after.guild, before.name != after.name or before.category_id != after.category_id,
+                            roles=False)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self.permissions.forget(after.id)
+            self.mutations.member_updated(after.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.permissions.forget(member.id)
 
     async def cog_load(self):
         await self.settings.cog_load()
+        await self.backend.start()
+        self.mutations.start()
         log.debug('utils: ready')
 
+    async def cog_unload(self):
+        for job in self._purge_jobs.values():
+            job.cancel()
+        await self.mutations.stop()
+        await self.backend.close()
+
     @commands.command(name='crash_log')
     @commands.check(perms.is_support_user)
     async def crash_log(self, ctx):
@@ -71,19 +129,53 @@ class UtilsCog(commands.Cog):
     @commands.command(name='purge')
     @commands.check(perms.is_support_user)
     async def purge(self, ctx):
+        """
+        Commande: !purge [JJ/MM/AAAA] [depuis:JJ/MM/AAAA] [@auteur ...]
+        Commande: !purge stop
+
+        Supprime en tâche de fond les messages du canal postés jusqu'au jour indiqué (inclus, aujourd'hui par
+        défaut), éventuellement à partir d'un jour et seulement ceux des auteurs mentionnés.
+        """
         if ctx.channel.type != ChannelType.text and ctx.channel.type != ChannelType.news:
             return
 
-        date = datetime.now().date()
-        args = ctx.message.content.split(' ')
+        args = ctx.message.content.split()[1:]
+        running = self._purge_jobs.get(ctx.channel.id)
+
+        if args and args[0].lower() == 'stop':
+            if running is None:
+                await ctx.reply("Aucune purge en cours dans ce canal")
+            else:
+                running.cancel()
+            return
+
+        if running is not None:
+            await ctx.reply("Une purge est déjà en cours dans ce canal (`!purge stop` pour l'annuler)")
+            return
+
+        # by default everything up to now
+        before = None
+        after = None
+
+        try:
+            for arg in args:
+                if arg.startswith('<@'):
+                    continue  # author mention, see ctx.message.mentions
+                elif arg.lower().startswith('depuis:'):
+                    after = parse_day(arg[len('depuis:'):])
+                else:
+                    before = parse_day(arg, end_of_day=True)
+        except ValueError:
+            await ctx.reply("Usage : `!purge [JJ/MM/AAAA] [depuis:JJ/MM/AAAA] [@auteur ...]` ou `!purge stop`")
+            return
 
-        if len(args) >= 2:
-            date = datetime.strptime(args[1], '%d/%m/%Y').date()
+        author_ids = {member.id for member in ctx.message.mentions} or None
 
-        async for message in ctx.history(limit=None):
-            if message.created_at.date() <= date:
-                await message.delete()
-                await asyncio.sleep(0.1)  # rate limiting
+        progress = await ctx.reply("Purge en cours...")
+        job = PurgeJob(ctx.channel, before=before, after=after, author_ids=author_ids,
+                       keep_ids={progress.id})
+        self._purge_jobs[ctx.channel.id] = job
+        job.start(progress).add_done_callback(lambda _: self._purge_jobs.pop(ctx.channel.id, None))
 
 
 async def setup(bot):
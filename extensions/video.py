@@ -18,7 +18,7 @@ class VideoCog(BaseCog):
     async def cog_load(self):
         await super().cog_load()
 
-        self.channel_videos = discord.utils.find(lambda c: c.name == 'videos', self.guild.channels)
+        self.channel_videos = self.settings.index.channel('videos')
 
     @commands.command(name='video')
     async def video(self, ctx, url: str, *, message: typing.Optional[str]):
@@ -0,0 +1,66 @@
+import sys
+import threading
+import time
+import traceback
+
+import structlog
+
+log = structlog.get_logger('watchdog')
+
+
+class StallWatchdog:
+    """
+    Detects event loop stalls from outside the loop.
+
+    The loop calls `beat()` regularly; a daemon thread checks how long ago the
+    last beat was and, once it is older than `threshold`, captures the stack of
+    the event loop thread while it is still blocked, which points at the
+    blocking call. When the loop comes back, the next `beat()` hands the stall
+    duration and the captured stack to `on_stall` (called on the loop).
+    """
+
+    def __init__(self, threshold, on_stall, check_interval=0.1):
+        self.threshold = threshold
+        self.on_stall = on_stall
+        self.check_interval = check_interval
+        self.stall_count = 0
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._captured_stack = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Must be called from the event loop thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def beat(self):
+        now = time.monotonic()
+        with self._lock:
+            stalled_for = now - self._last_beat
+            stack, self._captured_stack = self._captured_stack, None
+            self._last_beat = now
+
+        if stack is not None:
+            self.stall_count += 1
+            self.on_stall(stalled_for, stack)
+
+    def _run(self):
+        while not self._stopping.wait(self.check_interval):
+            with self._lock:
+                if self._captured_stack is not None or time.monotonic() - self._last_beat < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                self._captured_stack = ''.join(traceback.format_stack(frame))
+
+            log.warning('event loop stalled', threshold=self.threshold)
@@ -1,24 +1,39 @@
-from functools import cached_property
 from typing import Optional
 import asyncio
+import time
 
 import discord
-import requests
 import structlog
 from discord.errors import Forbidden
 from discord.ext import tasks, commands
 
+from extensions.backend import BackendError
 from extensions.base_cog import BaseCog, progress_message
+from extensions.broadcast import DmBroadcast
 from extensions.perms import is_support_user
 
 log = structlog.get_logger()
 
 
+def _attendee_sync_key(attendee):
+    """The fields of an attendee record that affect the welcome logic (role and nickname)."""
+    return attendee.get('role'), attendee.get('first_name'), attendee.get('last_name')
+
+
 class WelcomeCog(BaseCog):
+    # a member whose welcome keeps failing (e.g. above the bot in the role hierarchy) is retried
+    # with an exponential backoff, then left alone until their backend record changes
+    WELCOME_RETRY_DELAY = 300
+    WELCOME_MAX_ATTEMPTS = 5
+
     def __init__(self, bot):
         super().__init__(bot)
+        # {discord_unique_id: _attendee_sync_key(attendee)} as of the last sync
+        self._synced_attendees = {}
+        # {discord_unique_id: (sync key, failed attempts, time.monotonic() of the next attempt)}
+        self._welcome_failures = {}
 
-    @cached_property
+    @property
     def channel_welcome(self) -> discord.TextChannel:
         return self.settings.get_channel('WELCOME')
 
@@ -32,17 +47,6 @@ class WelcomeCog(BaseCog):
         else:
             log.info('check_attendees_task disabled (WELCOME_MODE=close)')
 
-    def _get_attendees_data(self):
-        response = requests.get(f"{self.settings.URL_API}/api/attendees/", timeout=10)
-        response.raise_for_status()
-        
-        # Handle empty response
-        if not response.text.strip():
-            log.error('attendees_api_empty_response')
-            return []
-        
-        return response.json()
-    
     async def _assign_discord_role(self, member: discord.Member, role_name: str, context: str = 'operation'):
         """
         Assigns a Discord role to a member.
@@ -50,7 +54,7 @@ class WelcomeCog(BaseCog):
         Returns:
             bool: True if role was assigned or already present, False otherwise
         """
-        discord_role = discord.utils.find(lambda r: r.name.lower() == role_name.lower(), self.guild.roles)
+        discord_role = self.settings.index.role(role_name, case_insensitive=True)
         
         if not discord_role:
             log.warning(f'{context}_role_not_found', member=member.name, role_name=role_name)
@@ -60,13 +64,12 @@ class WelcomeCog(BaseCog):
             log.info(f'{context}_role_already_assigned', member=member.name, role=discord_role.name)
             return True
         
-        try:
-            await member.add_roles(discord_role)
+        if await self.mutations.edit(member, add_roles=[discord_role]):
             log.info(f'{context}_role_assigned', member=member.name, role=discord_role.name)
             return True
-        except Forbidden:
-            log.warning(f'{context}_role_permission_denied', member=member.name, role_name=role_name)
-            return False
+
+        log.warning(f'{context}_role_permission_denied', member=member.name, role_name=role_name)
+        return False
     
     async def _finalize_member_link(self, ctx, member: discord.Member, attendee_id: int, email: str, role_name: str, context: str = 'operation'):
         """
@@ -79,7 +82,7 @@ class WelcomeCog(BaseCog):
         role_assigned = await self._assign_discord_role(member, role_name, context)
         
         if not role_assigned:
-            discord_role = discord.utils.find(lambda r: r.name.lower() == role_name.lower(), self.guild.roles)
+            discord_role = self.settings.index.role(role_name, case_insensitive=True)
             if not discord_role:
                 await ctx.send(f"⚠️ Warning: Role `{role_name}` not found on Discord server.")
             else:
@@ -87,12 +90,12 @@ class WelcomeCog(BaseCog):
         
         # Refresh attendee data and rename the member
         try:
-            attendees = self._get_attendees_data()
+            await self.attendees.load(force=True)
             # Prioritize attendee_id lookup, fall back to email only if no ID
             if attendee_id:
-                found_attendee_updated = next((att for att in attendees if att.get('id') == attendee_id), None)
+                found_attendee_updated = self.attendees.by_id(attendee_id)
             else:
-                found_attendee_updated = next((att for att in attendees if att.get('email_address') == email), None)
+                found_attendee_updated = self.attendees.by_email(email)
             
             if found_attendee_updated:
                 await self._rename_member(found_attendee_updated, member, pedantic=True)
@@ -113,56 +116,66 @@ class WelcomeCog(BaseCog):
         """Returns the Discord username, handling the discriminator properly."""
         return f"{member.name}#{member.discriminator}" if member.discriminator != "0" else member.name
 
-    async def welcome_member_helper(self, ctx, member: discord.Member, attendees_data=None, pedantic=True):
+    async def welcome_member_helper(self, ctx, member: discord.Member, pedantic=True) -> bool:
+        """Applies the attendee's role and nickname to the member; returns False if Discord refused a change."""
         if pedantic:
             log.info('welcome member', member=member.name, member_id=member.id)
-        attendees = attendees_data or self._get_attendees_data()
 
-        found_attendee = next((attendee for attendee in attendees if attendee["discord_unique_id"] == member.id), None)
+        found_attendee = await self.attendees.find_discord_id(member.id)
 
         if found_attendee is None:
             if pedantic:
                 log.warning('member not found in attendees list', member_id=member.id, member_name=member.name)
-            return
+            return False
 
         role: Optional[discord.Role] = None
 
         if found_attendee.get('role'):
-            role = discord.utils.find(lambda r: r.name.lower() == found_attendee['role'].lower(),
-                                      self.guild.roles)
+            role = self.settings.index.role(found_attendee['role'], case_insensitive=True)
 
         if role is None:
             if pedantic:
                 log.warning('no role defined or found for member', member_name=member.name,
                             member_id=member.id)
 
-        await self._rename_member(found_attendee, member, pedantic)
+        # rename and role assignment are queued together so they go out as a single member edit
+        rename = self._rename_member(found_attendee, member, pedantic)
 
         if role and role not in member.roles:
             log.info('adding role to member', role=role.name, member=member.name)
-            await member.add_roles(role)
-            await self.channel_welcome.send(
-                f"Bienvenue à {member.mention} sur le Discord du {self.settings.EVENT_NAME} !")
+            role_added, renamed = await asyncio.gather(self.mutations.submit(member, add_roles=[role]), rename)
+
+            if role_added:
+                await self.channel_welcome.send(
+                    f"Bienvenue à {member.mention} sur le Discord du {self.settings.EVENT_NAME} !")
+            return role_added and renamed
+
+        return await rename
 
-    async def _rename_member(self, found_attendee, member, pedantic=True):
+    @staticmethod
+    def _attendee_nick(found_attendee):
         new_nick = f"{found_attendee['first_name'].title()} {found_attendee['last_name'][0].upper()}"
-        
+
         # Discord nicknames must be 32 characters or fewer
         if len(new_nick) > 32:
             # Truncate the first name if needed, keeping at least the last name initial
             max_first_name_length = 30  # 32 - 1 (space) - 1 (last name initial)
             truncated_first_name = found_attendee['first_name'].title()[:max_first_name_length]
             new_nick = f"{truncated_first_name} {found_attendee['last_name'][0].upper()}"
-            
+
+        return new_nick
+
+    async def _rename_member(self, found_attendee, member, pedantic=True) -> bool:
+        new_nick = self._attendee_nick(found_attendee)
+
         if member.nick != new_nick:
-            try:
-                if pedantic:
-                    log.info('renaming member', first_name=found_attendee['first_name'],
-                             last_name=found_attendee['last_name'],
-                             new_nick=new_nick, nick_length=len(new_nick))
-                await member.edit(nick=new_nick)
-            except Forbidden:
-                pass
+            if pedantic:
+                log.info('renaming member', first_name=found_attendee['first_name'],
+                         last_name=found_attendee['last_name'],
+                         new_nick=new_nick, nick_length=len(new_nick))
+            return await self.mutations.edit(member, nick=new_nick)
+
+        return True
 
     @commands.command(name='welcome_member')
     @commands.check(is_support_user)
@@ -178,29 +191,95 @@ class WelcomeCog(BaseCog):
     async def check_attendees_task(self):
         await self.check_attendees()
 
-    async def check_attendees(self):
-        log.info('check_attendees')
-        attendees = self._get_attendees_data()
+    async def check_attendees(self, full=False):
+        """
+        Applies the welcome logic to the members whose backend record changed since the previous sync
+        (new discord link, role or name), or to every known member if `full` is set.
+
+        Members are taken from the gateway cache, so a sync costs one attendee download plus one
+        helper call per change, whatever the size of the guild.
+        """
+        attendees = await self.attendees.load(force=True)
 
-        async for member in self.guild.fetch_members(limit=None):
-            await self.welcome_member_helper(None, member, attendees, pedantic=False)
+        snapshot = {
+            attendee['discord_unique_id']: _attendee_sync_key(attendee)
+            for attendee in attendees
+            if attendee.get('discord_unique_id') is not None
+        }
+
+        if full:
+            changed_ids = list(snapshot.keys())
+        else:
+            changed_ids = [discord_id for discord_id, key in snapshot.items()
+                           if self._synced_attendees.get(discord_id) != key]
+
+        log.info('check_attendees', full=full, attendees=len(snapshot), changed=len(changed_ids))
+
+        # a member whose welcome failed stays out of the synced snapshot, so the next pass retries them
+        pending = set(changed_ids)
+        synced = {discord_id: key for discord_id, key in snapshot.items() if discord_id not in pending}
+        failed = 0
+
+        for discord_id in changed_ids:
+            member = self.guild.get_member(discord_id)
+
+            if member is None:
+                # not on the server yet: on_member_join will welcome them
+                synced[discord_id] = snapshot[discord_id]
+                continue
+
+            key, attempts, retry_at = self._welcome_failures.get(discord_id, (None, 0, 0))
+            if key != snapshot[discord_id]:
+                # first failure, or the record changed since: start over
+                attempts, retry_at = 0, 0
+            elif not full and time.monotonic() < retry_at:
+                continue
+
+            try:
+                welcomed = await self.welcome_member_helper(None, member, pedantic=False)
+            except Exception as e:
+                log.error('check_attendees_member_failed', member=member.name, member_id=member.id, exc_info=e)
+                welcomed = False
+
+            if welcomed:
+                synced[discord_id] = snapshot[discord_id]
+                self._welcome_failures.pop(discord_id, None)
+                continue
+
+            attempts += 1
+            if attempts >= self.WELCOME_MAX_ATTEMPTS:
+                log.warning('check_attendees_giving_up', member=member.name, member_id=member.id, attempts=attempts)
+                synced[discord_id] = snapshot[discord_id]
+                self._welcome_failures.pop(discord_id, None)
+                continue
+
+            failed += 1
+            self._welcome_failures[discord_id] = (
+                snapshot[discord_id], attempts, time.monotonic() + self.WELCOME_RETRY_DELAY * 2 ** (attempts - 1))
+
+        # members gone from the backend don't need a retry anymore
+        for discord_id in [d for d in self._welcome_failures if d not in snapshot]:
+            del self._welcome_failures[discord_id]
+
+        if failed:
+            log.warning('check_attendees_retry_later', failed=failed)
+
+        self._synced_attendees = synced
 
     @commands.command(name='check_attendees')
     @commands.check(is_support_user)
     async def check_attendees_command(self, ctx):
         async with progress_message(ctx, 'check attendees'):
-            await self.check_attendees()
+            await self.check_attendees(full=True)
 
     @commands.command(name='change_nicks')
     @commands.check(is_support_user)
     async def change_nicks(self, ctx):
         async with progress_message(ctx, 'changing nicks'):
-            attendees = self._get_attendees_data()
+            await self.attendees.load()
 
             async for member in self.guild.fetch_members(limit=None):
-                found_attendee = next(
-                    (attendee for attendee in attendees if attendee["discord_unique_id"] == member.id),
-                    None)
+                found_attendee = self.attendees.by_discord_id(member.id)
 
                 if found_attendee is None:
                     continue
@@ -231,11 +310,9 @@ class WelcomeCog(BaseCog):
         """
         async with progress_message(ctx, f'linking {member.mention} to {email}'):
             try:
-                # Get all attendees
-                attendees = self._get_attendees_data()
-                
                 # Find attendee by email
-                found_attendee = next((att for att in attendees if att.get('email_address') == email), None)
+                await self.attendees.load()
+                found_attendee = self.attendees.by_email(email)
                 
                 if found_attendee is None:
                     await ctx.send(f"❌ No attendee found with email `{email}` in the backend.")
@@ -276,11 +353,7 @@ class WelcomeCog(BaseCog):
                     'role': target_role_name,
                 }
                 
-                response = requests.patch(
-                    f"{self.settings.URL_API}/api/attendees/{attendee_id}/",
-                    json=update_data,
-                    timeout=10
-                )
+                response = await self.backend.patch(f"/api/attendees/{attendee_id}/", json=update_data)
                 
                 if response.status_code not in [200, 204]:
                     await ctx.send(f"❌ Failed to update backend: {response.status_code} - {response.text}")
@@ -302,7 +375,7 @@ class WelcomeCog(BaseCog):
                 
                 await ctx.send(success_msg)
                 
-            except requests.exceptions.RequestException as e:
+            except BackendError as e:
                 await ctx.send(f"❌ Failed to connect to API: {str(e)}")
                 log.error('link_member_api_error', exc_info=e)
             except Exception as e:
@@ -346,11 +419,9 @@ class WelcomeCog(BaseCog):
         """
         async with progress_message(ctx, f'creating/linking {member.mention}'):
             try:
-                # Get all attendees
-                attendees = self._get_attendees_data()
-                
                 # Find attendee by email
-                found_attendee = next((att for att in attendees if att.get('email_address') == email), None)
+                await self.attendees.load()
+                found_attendee = self.attendees.by_email(email)
                 
                 # Determine role to assign
                 target_role_name = role_name or self.settings.PARTICIPANT_ROLE
@@ -400,11 +471,7 @@ class WelcomeCog(BaseCog):
                         'role': target_role_name,
                     }
                     
-                    response = requests.patch(
-                        f"{self.settings.URL_API}/api/attendees/{attendee_id}/",
-                        json=update_data,
-                        timeout=10
-                    )
+                    response = await self.backend.patch(f"/api/attendees/{attendee_id}/", json=update_data)
                     
                     if response.status_code not in [200, 204]:
                         await ctx.send(f"❌ Failed to update backend: {response.status_code} - {response.text}")
@@ -426,11 +493,7 @@ class WelcomeCog(BaseCog):
                         'role': target_role_name,
                     }
                     
-                    response = requests.post(
-                        f"{self.settings.URL_API}/api/attendees/",
-                        json=create_data,
-                        timeout=10
-                    )
+                    response = await self.backend.post('/api/attendees/', json=create_data)
                     
                     if response.status_code not in [200, 201]:
                         await ctx.send(f"❌ Failed to create attendee in backend: {response.status_code} - {response.text}")
@@ -463,7 +526,7 @@ class WelcomeCog(BaseCog):
                 
                 await ctx.send(success_msg)
                 
-            except requests.exceptions.RequestException as e:
+            except BackendError as e:
                 await ctx.send(f"❌ Failed to connect to API: {str(e)}")
                 log.error('create_member_api_error', exc_info=e)
             except Exception as e:
@@ -529,22 +592,16 @@ class WelcomeCog(BaseCog):
         
         Requires Support role.
         """
-        async with progress_message(ctx, 'nudging unidentified users'):
-            attendees = self._get_attendees_data()
-            # Build set of identified Discord IDs, filtering out None values explicitly
-            identified_discord_ids = {
-                att['discord_unique_id'] 
-                for att in attendees 
-                if att.get('discord_unique_id') is not None
-            }
+        async with progress_message(ctx, 'nudging unidentified users') as msg:
+            await self.attendees.load(force=True)
+            identified_discord_ids = self.attendees.discord_ids
             
-            success_count = 0
-            failed_count = 0
             skipped_bots = 0
             skipped_offline = 0
-            notified_users = []  # Track successfully notified users
+            recipients = []
             
-            async for member in self.guild.fetch_members(limit=None):
+            # gateway cache: unlike fetch_members, it carries the presence used to skip offline users
+            for member in self.guild.members:
                 # Skip bots
                 if member.bot:
                     skipped_bots += 1
@@ -560,27 +617,15 @@ class WelcomeCog(BaseCog):
                     continue
                 
                 # This member is not identified - send them a DM
-                try:
-                    dm_channel = member.dm_channel
-                    if dm_channel is None:
-                        dm_channel = await member.create_dm()
-                    
-                    embed = self._create_nudge_embed(member)
-                    await dm_channel.send(embed=embed)
-                    success_count += 1
-                    notified_users.append(member)  # Add to list of notified users
-                    log.info('nudge_dm_sent', member=member.name, member_id=member.id)
-                    
-                    # Rate limiting: wait 0.5 seconds between DMs to avoid hitting Discord limits
-                    await asyncio.sleep(0.5)
-                    
-                except Forbidden:
-                    # User has DMs disabled
-                    failed_count += 1
-                    log.warning('nudge_dm_failed_forbidden', member=member.name, member_id=member.id)
-                except Exception as e:
-                    failed_count += 1
-                    log.error('nudge_dm_failed', member=member.name, member_id=member.id, exc_info=e)
+                recipients.append((member, {'embed': self._create_nudge_embed(member)}))
+
+            broadcast = DmBroadcast('nudge_unidentified_users', self.settings.STATE_DIR,
+                                    workers=self.settings.DM_WORKERS)
+            result = await broadcast.run(recipients, progress_message=msg, task_desc='nudging unidentified users')
+
+            success_count = len(result.sent)
+            failed_count = result.failed
+            notified_users = result.sent  # Track successfully notified users
             
             # Create a nice embed with summary
             result_embed = discord.Embed(
@@ -596,7 +641,8 @@ class WelcomeCog(BaseCog):
                     f"❌ Failed: **{failed_count}**\n"
                     f"💤 Offline (skipped): **{skipped_offline}**\n"
                     f"🤖 Bots (skipped): **{skipped_bots}**\n"
-                    f"📝 Total unidentified online: **{success_count + failed_count}**"
+                    f"⏭️ Already notified before restart: **{result.resumed}**\n"
+                    f"📝 Total unidentified online: **{success_count + failed_count + result.resumed}**"
                 ),
                 inline=False
             )
@@ -2,7 +2,8 @@ import discord
 from discord.ext import commands
 
 from . import perms
-from .base_cog import BaseCog
+from .base_cog import BaseCog, progress_message
+from .broadcast import DmBroadcast
 
 
 class WorkAdventuresCog(BaseCog):
@@ -26,8 +27,8 @@ class WorkAdventuresCog(BaseCog):
 
         self.welcome_cog = self.bot.get_cog('WelcomeCog')
 
-        self.channel_help = discord.utils.find(lambda c: c.name == self.settings.CHANNEL_HELP, self.guild.channels)
-        self.channel_bdd_workadventures = discord.utils.find(lambda c: c.name == 'workadventures', self.guild.channels)
+        self.channel_help = self.settings.index.channel(self.settings.CHANNEL_HELP)
+        self.channel_bdd_workadventures = self.settings.index.channel('workadventures')
 
         await self.loadUsersWorkAdventures()
 
@@ -70,37 +71,47 @@ class WorkAdventuresCog(BaseCog):
     @commands.command(name='workadventures')
     @commands.check(perms.is_support_user)
     async def workadventures(self, ctx):
+        recipients = []
+        help_notices = []
+
         for member in self.guild.members:
             if member.bot:
                 continue
 
-            dm_channel = member.dm_channel
-
-            if dm_channel is None:
-                dm_channel = await member.create_dm()
-
             user_link = next(
                 (user_link for user_link in self.welcome_cog.users_link if user_link["discord_id"] == member.id), None)
 
             if user_link is None:
-                await dm_channel.send(
-                    f"Oups ! J'ai oublié ton adresse e-mail. J’ai envoyé un message aux organisateurs pour qu’ils viennent vous aider !")
-                await self.channel_help.send(
-                    f"Je ne connais pas l'adresse e-mail pour Work Adventure de {member.mention} !")
+                recipients.append((member, {'content':
+                    f"Oups ! J'ai oublié ton adresse e-mail. J’ai envoyé un message aux organisateurs pour qu’ils viennent vous aider !"}))
+                help_notices.append(f"Je ne connais pas l'adresse e-mail pour Work Adventure de {member.mention} !")
                 continue
 
             user_workadventures = next((user_workadventures for user_workadventures in self.users_workadventures if
                                         user_workadventures['mail'] == user_link['mail']), None)
 
             if user_workadventures is None:
-                await dm_channel.send(
-                    f"Ahh, je connais pas ton lien pour Work Adventure. J’ai envoyé un message aux organisateurs pour qu’ils viennent vous aider !")
-                await self.channel_help.send(
-                    f"Je n'ai pas connaissance du lien pour Work Adventure de {member.mention} !")
+                recipients.append((member, {'content':
+                    f"Ahh, je connais pas ton lien pour Work Adventure. J’ai envoyé un message aux organisateurs pour qu’ils viennent vous aider !"}))
+                help_notices.append(f"Je n'ai pas connaissance du lien pour Work Adventure de {member.mention} !")
                 continue
 
-            await dm_channel.send(
-                f"Voici votre lien pour joindre Work Adventure du {self.settings.EVENT_NAME} : {user_workadventures['token']}")
+            recipients.append((member, {'content':
+                f"Voici votre lien pour joindre Work Adventure du {self.settings.EVENT_NAME} : {user_workadventures['token']}"}))
+
+        async with progress_message(ctx, 'workadventures') as msg:
+            broadcast = DmBroadcast('workadventures', self.settings.STATE_DIR, workers=self.settings.DM_WORKERS)
+            await broadcast.run(recipients, progress_message=msg, task_desc='workadventures')
+
+        # group the notices so the help channel gets a few messages instead of one per member
+        chunk = ""
+        for notice in help_notices:
+            if len(chunk) + len(notice) + 1 > 2000:
+                await self.channel_help.send(chunk)
+                chunk = ""
+            chunk += notice + "\n"
+        if chunk:
+            await self.channel_help.send(chunk)
 
 
 async def setup(bot):
@@ -0,0 +1,100 @@
+"""
+Measures the cold start of the bot process.
+
+    python startup_benchmark.py           # import time of each extension, checked against IMPORT_BUDGET
+    python startup_benchmark.py --ready   # also starts bot.py and reports its time-to-ready (needs BOT_TOKEN)
+
+Each extension is imported in a fresh interpreter, after the modules bot.py
+itself imports, so the figure is what the extension adds to the startup.
+The list of extensions is read from bot.py without importing it (importing
+bot.py creates the bot and its web app).
+The exit code is 1 when an extension is over budget or the bot did not
+become ready.
+"""
+import ast
+import json
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from os import getenv
+from os.path import dirname, join
+
+# seconds an extension may add to the interpreter startup
+IMPORT_BUDGET = 0.15
+
+READY_TIMEOUT = 120
+
+_IMPORT_PROBE = """
+import time
+import discord, structlog, dotenv
+from discord.ext import commands
+started_at = time.perf_counter()
+import {name}
+print(time.perf_counter() - started_at)
+"""
+
+
+def load_extension_names():
+    """The keys of bot.EXTENSIONS, read from the source of bot.py."""
+    with open(join(dirname(__file__), 'bot.py')) as f:
+        tree = ast.parse(f.read())
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'EXTENSIONS' for t in node.targets):
+            return list(ast.literal_eval(node.value))
+
+    raise RuntimeError('EXTENSIONS not found in bot.py')
+
+
+def import_time(name):
+    output = subprocess.run([sys.executable, '-c', _IMPORT_PROBE.format(name=name)], cwd=dirname(__file__) or None,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_to_ready():
+    """Starts bot.py and polls its /health until the extensions are loaded; returns the bot's own measure."""
+    url = f"http://127.0.0.1:{getenv('BOT_METRICS_PORT', '8765')}/health"
+    process = subprocess.Popen([sys.executable, 'bot.py'], cwd=dirname(__file__) or None)
+    deadline = time.monotonic() + READY_TIMEOUT
+
+    try:
+        while time.monotonic() < deadline and process.poll() is None:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    ready = json.load(response).get('time_to_ready')
+                if ready is not None:
+                    return ready
+            except (urllib.error.URLError, OSError, ValueError):
+                pass
+            time.sleep(0.2)
+        return None
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    over_budget = False
+
+    print(f"{'extension':<26} {'import':>8}")
+    for name in load_extension_names():
+        duration = import_time(name)
+        flag = ' over budget' if duration > IMPORT_BUDGET else ''
+        over_budget |= bool(flag)
+        print(f"{name:<26} {duration:7.3f}s{flag}")
+
+    if '--ready' in sys.argv:
+        ready = time_to_ready()
+        if ready is None:
+            print('bot did not become ready')
+            return 1
+        print(f"time to ready: {ready:.2f}s")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import subprocess
+import sys
+import threading
+import time
+from os.path import dirname, join
+
+import structlog
+
+log = structlog.get_logger()
+
+
+class BotSupervisor:
+    """
+    Runs `bot.py` as a managed child process from a background thread and
+    restarts it as soon as it exits. Consecutive quick crashes back off
+    exponentially; the delay is reset once the bot stayed up long enough.
+    """
+
+    MIN_BACKOFF = 1
+    MAX_BACKOFF = 60
+    # a run longer than this is considered healthy and resets the backoff
+    STABLE_UPTIME = 60
+
+    def __init__(self, script=join(dirname(__file__), 'bot.py')):
+        self.script = script
+        self.process = None
+        self.started_at = None
+        self.restart_count = 0
+        self.last_exit_code = None
+        self.last_exit_reason = None
+        self.last_exit_at = None
+        self._backoff = self.MIN_BACKOFF
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bot-supervisor', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            log.info('starting bot', restart_count=self.restart_count)
+            self.started_at = time.time()
+
+            try:
+                self.process = subprocess.Popen([sys.executable, self.script], cwd=dirname(self.script) or None)
+                exit_code = self.process.wait()
+                reason = f'exited with code {exit_code}' if exit_code >= 0 else f'killed by signal {-exit_code}'
+            except Exception as e:
+                exit_code = None
+                reason = f'failed to start: {e!r}'
+                log.error('bot crash', exc_info=e)
+
+            uptime = time.time() - self.started_at
+            self.last_exit_code = exit_code
+            self.last_exit_reason = reason
+            self.last_exit_at = time.time()
+            self.started_at = None
+
+            if self._stopping.is_set():
+                break
+
+            if uptime >= self.STABLE_UPTIME:
+                self._backoff = self.MIN_BACKOFF
+
+            log.error('bot stopped, restarting', reason=reason, uptime=uptime, backoff=self._backoff)
+            self._stopping.wait(self._backoff)
+            self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+            self.restart_count += 1
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def status(self):
+        return {
+            "running": self.running,
+            "pid": self.process.pid if self.running else None,
+            "uptime": time.time() - self.started_at if self.started_at and self.running else 0,
+            "restart_count": self.restart_count,
+            "last_exit_code": self.last_exit_code,
+            "last_exit_reason": self.last_exit_reason,
+            "last_exit_at": self.last_exit_at,
+            "next_backoff": self._backoff,
+        }